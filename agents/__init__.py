@@ -1 +0,0 @@
-print(true)
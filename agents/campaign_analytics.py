@@ -0,0 +1,249 @@
+import math
+from datetime import datetime, timezone
+
+METRICS = ("opened", "clicked", "replied", "meeting_booked")
+RATE_NAMES = {"opened": "open", "clicked": "click", "replied": "reply", "meeting_booked": "meeting"}
+
+
+def parse_day(timestamp):
+    """
+    Convert an ISO-8601 string or epoch seconds to a date ordinal, or None.
+    """
+    if timestamp is None:
+        return None
+    try:
+        if isinstance(timestamp, (int, float)):
+            return datetime.fromtimestamp(timestamp, tz=timezone.utc).date().toordinal()
+        return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).date().toordinal()
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def wilson_interval(successes, n, z=1.96):
+    """
+    Wilson score interval for a binomial proportion (95% by default).
+    """
+    if n == 0:
+        return (0.0, 0.0)
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return (max(0.0, centre - margin), min(1.0, centre + margin))
+
+
+class SegmentStats:
+    """
+    SegmentStats:
+    Running counts for one segment: all-time totals plus per-day buckets for
+    the last window_days days only, so memory per segment is bounded.
+    """
+
+    __slots__ = ("totals", "days", "window_days")
+
+    def __init__(self, window_days):
+        self.window_days = window_days
+        self.totals = [0] * (len(METRICS) + 1)
+        self.days = {}
+
+    def add(self, day, flags, sign=1, latest_day=None):
+        self.totals[0] += sign
+        for i, flag in enumerate(flags, start=1):
+            self.totals[i] += sign * flag
+        if day is None:
+            return
+        if latest_day is not None and day <= latest_day - self.window_days:
+            return
+        bucket = self.days.setdefault(day, [0] * (len(METRICS) + 1))
+        bucket[0] += sign
+        for i, flag in enumerate(flags, start=1):
+            bucket[i] += sign * flag
+
+    def prune(self, latest_day):
+        for day in [d for d in self.days if d <= latest_day - self.window_days]:
+            del self.days[day]
+
+    def window_totals(self):
+        counts = [0] * (len(METRICS) + 1)
+        for bucket in self.days.values():
+            for i, value in enumerate(bucket):
+                counts[i] += value
+        return counts
+
+
+class CampaignAnalytics:
+    """
+    CampaignAnalytics:
+    Single-pass, incrementally updatable aggregator of campaign responses.
+    Tracks open/click/reply/meeting rates with Wilson confidence intervals
+    overall and per campaign, day, persona, tone, role and technology, both
+    all-time and over a rolling window of the last window_days days.
+    Re-feeding a lead whose response changed (e.g. opened -> replied) replaces
+    its earlier contribution instead of double counting it. Only leads and day
+    segments within the window are kept (plus leads without a timestamp), so
+    memory doesn't grow with every lead and day seen; a lead re-fed after its
+    day has left the window is counted again in the all-time totals.
+    """
+
+    def __init__(self, window_days=7):
+        self.window_days = window_days
+        self.segments = {}
+        self.leads = {}
+        self.latest_day = None
+
+    def _segment_keys(self, response, attributes):
+        keys = [("all", "all")]
+        if response.get("campaign_id"):
+            keys.append(("campaign", response["campaign_id"]))
+        for name in ("persona", "tone", "role"):
+            value = attributes.get(name)
+            if value:
+                keys.append((name, value))
+        for tech in attributes.get("technologies") or []:
+            if isinstance(tech, dict):
+                tech = tech.get("name")  # PDL tech entries
+            try:
+                hash(tech)
+            except TypeError:
+                continue
+            if tech:
+                keys.append(("tech", tech))
+        return keys
+
+    def _in_window(self, day):
+        return self.latest_day is None or day > self.latest_day - self.window_days
+
+    def _apply(self, keys, day, flags, sign):
+        if day is not None and self._in_window(day):
+            keys = keys + [("day", datetime.fromordinal(day).date().isoformat())]
+        for key in keys:
+            stats = self.segments.get(key)
+            if stats is None:
+                stats = self.segments[key] = SegmentStats(self.window_days)
+            stats.add(day, flags, sign, self.latest_day)
+
+    def update(self, response, attributes=None):
+        """
+        Add one response (get_campaign_responses schema) with optional lead
+        attributes ({"persona", "tone", "role", "technologies"}).
+        """
+        attributes = attributes or {}
+        lead_key = (response.get("campaign_id"), response.get("lead"))
+        day = parse_day(response.get("timestamp"))
+        flags = tuple(int(bool(response.get(metric))) for metric in METRICS)
+        keys = self._segment_keys(response, attributes)
+
+        previous = self.leads.get(lead_key)
+        if previous is not None:
+            self._apply(*previous, sign=-1)
+
+        if day is not None and (self.latest_day is None or day > self.latest_day):
+            self.latest_day = day
+            self._prune()
+
+        self._apply(keys, day, flags, sign=1)
+        if day is None or self._in_window(day):
+            self.leads[lead_key] = (keys, day, flags)
+        else:
+            self.leads.pop(lead_key, None)
+
+    def _prune(self):
+        """
+        Drop per-day buckets, day segments and lead entries that left the window.
+        """
+        for key, stats in list(self.segments.items()):
+            if key[0] == "day" and not self._in_window(datetime.fromisoformat(key[1]).toordinal()):
+                del self.segments[key]
+            else:
+                stats.prune(self.latest_day)
+        for lead_key in [k for k, (_, day, _) in self.leads.items() if day is not None and not self._in_window(day)]:
+            del self.leads[lead_key]
+
+    def update_many(self, responses, lead_attributes=None):
+        lead_attributes = lead_attributes or {}
+        for response in responses:
+            self.update(response, lead_attributes.get(response.get("lead")))
+        return self
+
+    @staticmethod
+    def _rates(counts):
+        n = counts[0]
+        result = {"n": n}
+        for i, metric in enumerate(METRICS, start=1):
+            name = RATE_NAMES[metric]
+            result[f"{name}_rate"] = counts[i] / n if n else 0.0
+            result[f"{name}_ci"] = wilson_interval(counts[i], n)
+        return result
+
+    def rates(self, dimension="all", value="all", windowed=False):
+        """
+        Rates and 95% intervals for one segment, all-time or over the window.
+        """
+        stats = self.segments.get((dimension, value))
+        if stats is None:
+            return self._rates([0] * (len(METRICS) + 1))
+        return self._rates(stats.window_totals() if windowed else stats.totals)
+
+    def report(self, windowed=False):
+        """
+        {dimension: {value: rates}} for every segment seen so far.
+        """
+        report = {}
+        for (dimension, value), stats in self.segments.items():
+            counts = stats.window_totals() if windowed else stats.totals
+            if counts[0] > 0:
+                report.setdefault(dimension, {})[value] = self._rates(counts)
+        return report
+
+    def recommendations(self, min_sample=30):
+        """
+        Recommendations from segments whose rate interval excludes the overall
+        rate, plus a trend check of the rolling window against all-time rates.
+        """
+        overall = self.rates()
+        if overall["n"] == 0:
+            return ["No responses to analyze."]
+
+        recommendations = [
+            f"Overall: open {overall['open_rate']:.1%}, click {overall['click_rate']:.1%}, "
+            f"reply {overall['reply_rate']:.1%} across {overall['n']} leads."
+        ]
+        advice = {
+            "open": "subject lines",
+            "click": "CTA and links",
+            "reply": "personalization and targeting",
+        }
+
+        for (dimension, value), stats in sorted(self.segments.items(), key=lambda item: str(item[0])):
+            if dimension in ("all", "day") or stats.totals[0] < min_sample:
+                continue
+            segment = self._rates(stats.totals)
+            for metric in advice:
+                low, high = segment[f"{metric}_ci"]
+                baseline = overall[f"{metric}_rate"]
+                if low > baseline:
+                    recommendations.append(
+                        f"Lean into {dimension}={value}: {metric} rate {segment[f'{metric}_rate']:.1%} "
+                        f"(95% CI {low:.1%}-{high:.1%}) vs {baseline:.1%} overall."
+                    )
+                elif high < baseline:
+                    recommendations.append(
+                        f"Review {advice[metric]} for {dimension}={value}: {metric} rate "
+                        f"{segment[f'{metric}_rate']:.1%} (95% CI {low:.1%}-{high:.1%}) vs {baseline:.1%} overall."
+                    )
+
+        recent = self.rates(windowed=True)
+        if recent["n"] >= min_sample and recent["n"] < overall["n"]:
+            for metric in advice:
+                low, high = recent[f"{metric}_ci"]
+                if high < overall[f"{metric}_rate"]:
+                    recommendations.append(
+                        f"{metric.capitalize()} rate over the last {self.window_days} days "
+                        f"({recent[f'{metric}_rate']:.1%}) is below the all-time {overall[f'{metric}_rate']:.1%}; "
+                        f"revisit {advice[metric]}."
+                    )
+
+        if len(recommendations) == 1:
+            recommendations.append("No segment differs significantly from the overall rates yet; "
+                                   "continue testing variations.")
+        return recommendations
@@ -1,57 +1,123 @@
 import os
-import requests
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.enrichment_cache import EnrichmentCache
+from agents.http_client import get_http_client
+from agents.instrumentation import get_metrics
+from agents.lead import Lead
+from agents.rate_limiter import TokenBucket
 
 class DataEnrichmentAgent:
     """
     DataEnrichmentAgent:
     Enriches lead data with additional information like roles, technologies, company info.
     Uses People Data Labs (PDL) API as an alternative to Clearbit.
+    Requests are paced by a token bucket and can run on a bounded thread pool.
+    An optional EnrichmentCache short-circuits repeat leads before any network call.
     """
 
-    def __init__(self, pdl_api_key=None):
+    def __init__(self, pdl_api_key=None, max_workers=1, requests_per_second=2.0, burst=None, cache=None,
+                 metrics=None, http_client=None, rate_limiter=None):
         self.pdl_api_key = pdl_api_key or os.getenv("PDL_API_KEY")
         self.pdl_endpoint = "https://api.peopledatalabs.com/v5/person/enrich"
+        self.max_workers = max(1, int(max_workers))
+        # Default pacing matches the previous fixed 0.5s delay between calls;
+        # a limiter passed in (e.g. shared between processes) replaces it
+        self.rate_limiter = rate_limiter or TokenBucket(requests_per_second, capacity=burst or 1)
+        self.cache = cache
+        self.metrics = metrics or get_metrics()
+        self.http = http_client or get_http_client()
+        self.last_run_stats = {}
+        self._requests = 0
+        self._requests_lock = threading.Lock()
 
     def enrich_lead(self, lead):
         """
         Enrich a single lead using PDL API.
+        Cache hits skip both the network call and the rate limiter; cache
+        errors (e.g. a locked database) are treated as misses.
+        Lead records are updated in place; dicts are converted to a new Lead.
         """
+        lead = Lead.coerce(lead)
+        cached = self._cache_get(lead)
+        if cached is not None:
+            lead.role = cached.get("role") or "N/A"
+            lead.technologies = cached.get("technologies", [])
+            lead.mark_enriched()
+            return lead
+
         payload = {
             "email": lead.get("email"),
             "company": lead.get("company"),
             "api_key": self.pdl_api_key
         }
         try:
-            response = requests.get(self.pdl_endpoint, params=payload)
+            self.rate_limiter.acquire()  # Respect API rate limits
+            with self._requests_lock:
+                self._requests += 1
+            response = self.http.get(self.pdl_endpoint, "pdl", params=payload, metrics=self.metrics)
             response.raise_for_status()
             data = response.json()
 
-            enriched = {
-                "company": lead.get("company"),
-                "contact": lead.get("contact_name"),
-                "role": data.get("job_title") or "N/A",
-                "technologies": data.get("tech", []),
-            }
-            return enriched
+            lead.role = data.get("job_title") or "N/A"
+            lead.technologies = data.get("tech", [])
+            lead.mark_enriched()
         except Exception as e:
             print(f"[PDL API Error]: {e} for lead {lead.get('email')}")
-            return {
-                "company": lead.get("company"),
-                "contact": lead.get("contact_name"),
-                "role": "N/A",
-                "technologies": []
-            }
+            lead.role = "N/A"
+            lead.technologies = []
+            return lead
+        self._cache_set(lead, {"role": lead.role, "technologies": lead.technologies})
+        return lead
+
+    def _cache_get(self, lead):
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(lead)
+        except Exception as e:
+            print(f"[Enrichment Cache Error]: {e} for lead {lead.get('email')}")
+            return None
+
+    def _cache_set(self, lead, value):
+        if self.cache is None:
+            return
+        try:
+            self.cache.set(lead, value)
+        except Exception as e:
+            print(f"[Enrichment Cache Error]: {e} for lead {lead.get('email')}")
 
     def run(self, leads):
         """
         Main method to enrich a list of leads.
+        With max_workers > 1 leads are enriched concurrently; output order
+        always matches input order. `leads` may be a generator (e.g. a streaming
+        prospect search), in which case enrichment starts on the first lead.
+        The reported request rate counts PDL calls only, not cache hits.
         """
-        enriched_leads = []
-        for lead in leads:
-            enriched = self.enrich_lead(lead)
-            enriched_leads.append(enriched)
-            time.sleep(0.5)  # Respect API rate limits
+        with self._requests_lock:
+            self._requests = 0
+        start = time.monotonic()
+        if self.max_workers == 1:
+            enriched_leads = [self.enrich_lead(lead) for lead in leads]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                enriched_leads = list(pool.map(self.enrich_lead, leads))
+        elapsed = time.monotonic() - start
+
+        requests = self._requests
+        rps = requests / elapsed if elapsed > 0 else 0.0
+        self.last_run_stats = {
+            "leads": len(enriched_leads),
+            "requests": requests,
+            "elapsed_seconds": round(elapsed, 3),
+            "requests_per_second": round(rps, 2),
+        }
+        if self.cache is not None:
+            self.last_run_stats["cache"] = self.cache.stats()
+        print(f"[Enrichment] {len(enriched_leads)} leads, {requests} PDL requests in {elapsed:.2f}s ({rps:.2f} req/s)")
         return enriched_leads
 
 
@@ -61,7 +127,8 @@ if __name__ == "__main__":
         {"company": "Acme Corp", "contact_name": "John Doe", "email": "john.doe@acme.com"}
     ]
 
-    agent = DataEnrichmentAgent()
+    cache = EnrichmentCache(path=".cache/enrichment_cache.sqlite")
+    agent = DataEnrichmentAgent(max_workers=4, requests_per_second=5, cache=cache)
     enriched = agent.run(sample_leads)
     for lead in enriched:
         print(lead)
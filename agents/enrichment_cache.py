@@ -0,0 +1,51 @@
+from agents.identity_index import normalize_company, normalize_linkedin
+from agents.sqlite_cache import SQLiteCache
+
+class EnrichmentCache(SQLiteCache):
+    """
+    EnrichmentCache:
+    Disk-backed cache for enrichment results keyed by the lead's identity
+    (email, else LinkedIn URL, else company + contact name), with per-entry
+    TTL and LRU eviction. Leads with none of these are not cached.
+    """
+
+    table = "enrichment"
+
+    def __init__(self, path="enrichment_cache.sqlite", ttl_seconds=7 * 24 * 3600, max_entries=100_000):
+        super().__init__(path, ttl_seconds, max_entries)
+
+    @staticmethod
+    def make_key(lead):
+        """
+        Build the cache key for a lead from its normalized email and company,
+        falling back to its LinkedIn URL, then company + contact name. Returns
+        None when the lead has no identifying field.
+        """
+        email = (lead.get("email") or "").strip().lower()
+        company = (lead.get("company") or "").strip().lower()
+        if email:
+            return f"{email}|{company}"
+        linkedin = normalize_linkedin(lead.get("linkedin"))
+        if linkedin:
+            return f"linkedin:{linkedin}"
+        contact = " ".join((lead.get("contact_name") or "").lower().split())
+        company = normalize_company(lead.get("company"))
+        if contact and company:
+            return f"person:{company}|{contact}"
+        return None
+
+    def get(self, lead):
+        """
+        Return the cached enrichment for a lead, or None on a miss, an expired
+        entry or a lead that can't be keyed.
+        """
+        key = self.make_key(lead)
+        return self.get_key(key) if key is not None else None
+
+    def set(self, lead, value, ttl_seconds=None):
+        """
+        Store an enrichment result for a lead (skipped if it can't be keyed).
+        """
+        key = self.make_key(lead)
+        if key is not None:
+            self.set_key(key, value, ttl_seconds)
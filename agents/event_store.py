@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import threading
+
+class EventStore:
+    """
+    EventStore:
+    Local SQLite store of campaign response events, one row per campaign/lead.
+    Updates are merged (flags are OR-ed, the newest timestamp wins) so the same
+    event can safely arrive more than once from polling or webhooks. Also keeps
+    a per-campaign high-water mark used for incremental polling.
+    """
+
+    FLAGS = ("opened", "clicked", "replied", "meeting_booked")
+
+    def __init__(self, path="events.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                campaign_id TEXT NOT NULL,
+                lead TEXT NOT NULL,
+                opened INTEGER NOT NULL DEFAULT 0,
+                clicked INTEGER NOT NULL DEFAULT 0,
+                replied INTEGER NOT NULL DEFAULT 0,
+                meeting_booked INTEGER NOT NULL DEFAULT 0,
+                timestamp,
+                PRIMARY KEY (campaign_id, lead)
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cursors (campaign_id TEXT PRIMARY KEY, high_water)"
+        )
+        self.conn.commit()
+
+    def merge(self, campaign_id, responses):
+        """
+        Upsert response dicts (get_campaign_responses schema) for a campaign.
+        Returns the number of responses merged.
+        """
+        rows = [
+            (
+                campaign_id,
+                r.get("lead") or "",
+                *(int(bool(r.get(flag))) for flag in self.FLAGS),
+                r.get("timestamp"),
+            )
+            for r in responses
+        ]
+        if not rows:
+            return 0
+        with self.lock:
+            self.conn.executemany(
+                """
+                INSERT INTO events (campaign_id, lead, opened, clicked, replied, meeting_booked, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (campaign_id, lead) DO UPDATE SET
+                    opened = max(opened, excluded.opened),
+                    clicked = max(clicked, excluded.clicked),
+                    replied = max(replied, excluded.replied),
+                    meeting_booked = max(meeting_booked, excluded.meeting_booked),
+                    timestamp = CASE
+                        WHEN timestamp IS NULL OR excluded.timestamp > timestamp THEN excluded.timestamp
+                        ELSE timestamp END
+                """,
+                rows,
+            )
+            self.conn.commit()
+        return len(rows)
+
+    def get_high_water(self, campaign_id):
+        """
+        Return the newest event timestamp seen for a campaign, or None.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT high_water FROM cursors WHERE campaign_id = ?", (campaign_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_high_water(self, campaign_id, timestamp):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cursors (campaign_id, high_water) VALUES (?, ?)",
+                (campaign_id, timestamp),
+            )
+            self.conn.commit()
+
+    def responses(self, campaign_ids=None):
+        """
+        Return merged responses in the get_campaign_responses schema, plus
+        campaign_id, optionally limited to some campaigns.
+        """
+        query = "SELECT campaign_id, lead, opened, clicked, replied, meeting_booked, timestamp FROM events"
+        params = []
+        if campaign_ids is not None:
+            campaign_ids = list(campaign_ids)
+            query += f" WHERE campaign_id IN ({', '.join('?' * len(campaign_ids))})"
+            params = campaign_ids
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [
+            {
+                "campaign_id": campaign_id,
+                "lead": lead,
+                "opened": bool(opened),
+                "clicked": bool(clicked),
+                "replied": bool(replied),
+                "meeting_booked": bool(meeting_booked),
+                "timestamp": timestamp,
+            }
+            for campaign_id, lead, opened, clicked, replied, meeting_booked, timestamp in rows
+        ]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
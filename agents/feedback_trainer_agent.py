@@ -1,20 +1,70 @@
 import os
+import time
+import random
+import threading
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-from statistics import mean
+
+from agents.campaign_analytics import CampaignAnalytics
+from agents.instrumentation import get_metrics
+
+# Authorized clients and opened worksheets shared by all agents in the process
+_clients = {}
+_worksheets = {}
+_clients_lock = threading.Lock()
 
 class FeedbackTrainerAgent:
     """
     FeedbackTrainerAgent:
     Analyzes campaign responses and suggests improvements to the outreach workflow.
     Stores recommendations in Google Sheets.
+    Rows are buffered and written with one append_rows call per flush (at the
+    end of each run, or earlier once flush_size rows or flush_interval seconds
+    accumulate); quota errors are retried with exponential backoff.
+    Authentication and opening the sheet are deferred until the first write,
+    and the authorized client is reused across agents in the same process.
     """
 
-    def __init__(self, sheet_id=None, creds_json_path="google_service_account.json"):
+    def __init__(self, sheet_id=None, creds_json_path="google_service_account.json", sheet=None,
+                 flush_size=100, flush_interval=5.0, max_retries=5, base_backoff=1.0,
+                 window_days=7, min_sample=30, metrics=None):
         self.sheet_id = sheet_id or os.getenv("SHEET_ID")
         self.creds_json_path = creds_json_path
-        self.gc = self.authenticate()
-        self.sheet = self.gc.open_by_key(self.sheet_id).sheet1
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.pending_rows = []
+        self.last_flush = time.monotonic()
+        self._sheet = sheet
+        self.min_sample = min_sample
+        self.analytics = CampaignAnalytics(window_days=window_days)
+        self.metrics = metrics or get_metrics()
+
+    @property
+    def gc(self):
+        """
+        Authorized gspread client, created on first use and shared per credentials file.
+        """
+        with _clients_lock:
+            client = _clients.get(self.creds_json_path)
+            if client is None:
+                client = _clients[self.creds_json_path] = self.authenticate()
+            return client
+
+    @property
+    def sheet(self):
+        """
+        Target worksheet, opened on first write and shared per sheet id.
+        """
+        if self._sheet is None:
+            key = (self.creds_json_path, self.sheet_id)
+            client = self.gc
+            with _clients_lock:
+                if key not in _worksheets:
+                    _worksheets[key] = client.open_by_key(self.sheet_id).sheet1
+                self._sheet = _worksheets[key]
+        return self._sheet
 
     def authenticate(self):
         """
@@ -26,46 +76,76 @@ class FeedbackTrainerAgent:
         client = gspread.authorize(creds)
         return client
 
-    def analyze_responses(self, responses):
+    def analyze_responses(self, responses, lead_attributes=None):
         """
-        Analyze open, click, reply rates and generate simple recommendations.
+        Fold responses into the streaming campaign analytics and generate
+        recommendations from the segmented rates. lead_attributes optionally
+        maps lead email -> {"persona", "tone", "role", "technologies"}.
+        The analytics persist on the agent, so later calls update them
+        incrementally.
         """
-        if not responses:
+        if not responses and self.analytics.rates()["n"] == 0:
             return ["No responses to analyze."]
 
-        open_rate = mean([r.get("opened", 0) for r in responses]) * 100
-        click_rate = mean([r.get("clicked", 0) for r in responses]) * 100
-        reply_rate = mean([r.get("replied", 0) for r in responses]) * 100
-
-        recommendations = []
+        self.analytics.update_many(responses, lead_attributes)
+        return self.analytics.recommendations(min_sample=self.min_sample)
 
-        if open_rate < 20:
-            recommendations.append("Consider improving email subject lines to increase opens.")
-        if click_rate < 10:
-            recommendations.append("Include clearer CTA or links to increase clicks.")
-        if reply_rate < 5:
-            recommendations.append("Personalize emails further or adjust targeting (ICP).")
-        if reply_rate >= 5:
-            recommendations.append("Current approach is effective, continue testing variations.")
+    def log_to_sheet(self, recommendations):
+        """
+        Queue recommendations for Google Sheets, flushing once the buffer is
+        large or old enough.
+        """
+        self.pending_rows.extend([rec] for rec in recommendations)
+        if (len(self.pending_rows) >= self.flush_size
+                or time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
 
-        return recommendations
+    @staticmethod
+    def _is_retryable(error):
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        return status in (429, 500, 503)
 
-    def log_to_sheet(self, recommendations):
+    def flush(self):
         """
-        Log recommendations to Google Sheets.
+        Write all buffered rows with a single append_rows call.
         """
-        for rec in recommendations:
-            self.sheet.append_row([rec])
+        if not self.pending_rows:
+            return
+        rows = self.pending_rows
+        for attempt in range(self.max_retries + 1):
+            try:
+                sheet = self.sheet
+                with self.metrics.call("http", "google_sheets"):
+                    sheet.append_rows(rows)
+                break
+            except Exception as e:
+                if not self._is_retryable(e) or attempt == self.max_retries:
+                    raise
+                self.metrics.retry("http", "google_sheets")
+                delay = self.base_backoff * (2 ** attempt) * (1 + random.random())
+                print(f"[Google Sheets Quota]: retrying in {delay:.1f}s")
+                time.sleep(delay)
+        self.pending_rows = []
+        self.last_flush = time.monotonic()
 
-    def run(self, responses):
+    def run(self, responses, dry_run=False, lead_attributes=None):
         """
         Main method: analyze responses and log recommendations.
+        With dry_run=True nothing is written (and Google is never contacted).
         Returns list of recommendations.
         """
-        recommendations = self.analyze_responses(responses)
-        self.log_to_sheet(recommendations)
+        recommendations = self.analyze_responses(responses, lead_attributes)
+        if not dry_run:
+            self.log_to_sheet(recommendations)
+            self.flush()
         return recommendations
 
+    def run_from_event_store(self, event_store, campaign_ids=None):
+        """
+        Analyze the responses collected in an EventStore (by polling or webhooks).
+        """
+        return self.run(event_store.responses(campaign_ids))
+
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from agents.instrumentation import get_metrics
+from agents.rate_limiter import TokenBucket
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a provider whose circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker:
+    Opens after failure_threshold consecutive failures and rejects calls for
+    reset_timeout seconds, then lets a single trial call through (half-open):
+    success closes the circuit again, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class HTTPClient:
+    """
+    HTTPClient:
+    Shared HTTP client for the network-facing agents. Requests go through one
+    pooled session (a keep-alive pool per host) with connect/read timeouts,
+    are retried with jittered exponential backoff on connection errors, 429
+    and 5xx (waiting for Retry-After when the server sends one), and are
+    guarded by a circuit breaker per provider. Providers can share a request
+    budget (token bucket), so agents using the same API key stay within one
+    rate limit; a 429 pauses every caller of that provider.
+    Non-idempotent requests (POST by default) are only retried when the
+    request can't have reached the server (connect timeouts) or on 429.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+    def __init__(self, connect_timeout=5.0, read_timeout=30.0, max_retries=3, base_backoff=0.5,
+                 max_backoff=30.0, pool_maxsize=16, failure_threshold=5, reset_timeout=30.0, metrics=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.metrics = metrics or get_metrics()
+        self.budgets = {}
+        self.breakers = {}
+        self.paused_until = {}
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def set_budget(self, provider, rate, burst=None):
+        """
+        Limit all requests to `provider` to `rate` per second (burst up to `burst`).
+        """
+        self.use_budget(provider, TokenBucket(rate, capacity=burst))
+
+    def use_budget(self, provider, bucket):
+        """
+        Pace requests to `provider` with an existing bucket, e.g. a
+        SharedTokenBucket drawn on by several worker processes.
+        """
+        with self.lock:
+            self.budgets[provider] = bucket
+
+    def breaker(self, provider):
+        with self.lock:
+            breaker = self.breakers.get(provider)
+            if breaker is None:
+                breaker = self.breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def _wait_turn(self, provider):
+        pause = self.paused_until.get(provider, 0.0) - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+        budget = self.budgets.get(provider)
+        if budget is not None:
+            budget.acquire()
+
+    def _pause(self, provider, seconds):
+        with self.lock:
+            self.paused_until[provider] = max(self.paused_until.get(provider, 0.0), time.monotonic() + seconds)
+
+    def request(self, method, url, provider, timeout=None, idempotent=None, metrics=None, **kwargs):
+        """
+        Send a request and return the final response (check it with
+        raise_for_status). `timeout` is (connect, read) or a read timeout.
+        Raises CircuitOpenError while the provider's breaker is open, and the
+        last connection error once retries are exhausted.
+        """
+        metrics = metrics or self.metrics
+        if idempotent is None:
+            idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        elif not isinstance(timeout, tuple):
+            timeout = (min(self.connect_timeout, timeout), timeout)
+        breaker = self.breaker(provider)
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                metrics.inc("http_circuit_open_total", provider=provider)
+                raise CircuitOpenError(f"circuit open for {provider}")
+            self._wait_turn(provider)
+
+            retry_after = None
+            try:
+                with metrics.call("http", provider) as call:
+                    response = self.session.request(method, url, timeout=timeout, **kwargs)
+                    call.record_response(response)
+            except requests.exceptions.ConnectTimeout:
+                # The connection was never made, so even a POST is safe to resend
+                breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+            except requests.exceptions.RequestException:
+                # Connection errors, read timeouts, broken chunked responses, ...
+                breaker.record_failure()
+                if attempt == self.max_retries or not idempotent:
+                    raise
+            except Exception:
+                # Anything else still ends a half-open trial, so the breaker
+                # can't stay stuck waiting for it
+                breaker.record_failure()
+                raise
+            else:
+                status = response.status_code
+                if status >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                retryable = status == 429 or (status in self.RETRY_STATUSES and idempotent)
+                if not retryable or attempt == self.max_retries:
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if status == 429:
+                    # The budget is shared, so every caller of this provider waits
+                    self._pause(provider, retry_after if retry_after is not None else self._backoff(attempt))
+
+            metrics.retry("http", provider)
+            time.sleep(retry_after if retry_after is not None else self._backoff(attempt))
+
+    def get(self, url, provider, **kwargs):
+        return self.request("GET", url, provider, **kwargs)
+
+    def post(self, url, provider, **kwargs):
+        return self.request("POST", url, provider, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+# Providers whose request budget can be shared by every agent in the process
+BUDGET_PROVIDERS = ("apollo", "clay")
+
+
+def get_http_client():
+    """
+    Process-wide HTTPClient, configured from the environment on first use:
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES and
+    <PROVIDER>_REQUESTS_PER_SECOND for the shared Apollo and Clay budgets.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient(
+                connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+                read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "30")),
+                max_retries=int(os.getenv("HTTP_MAX_RETRIES", "3")),
+            )
+            for provider in BUDGET_PROVIDERS:
+                rate = os.getenv(f"{provider.upper()}_REQUESTS_PER_SECOND")
+                if rate:
+                    _client.set_budget(provider, float(rate))
+        return _client
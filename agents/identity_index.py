@@ -0,0 +1,203 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit
+
+COMPANY_SUFFIXES = {"inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "gmbh", "plc", "sa", "ag"}
+
+
+def normalize_email(email):
+    """
+    Lowercase, trim and drop +tags from the local part.
+    """
+    email = (email or "").strip().lower()
+    if "@" not in email:
+        return None
+    local, domain = email.rsplit("@", 1)
+    local = local.split("+", 1)[0]
+    return f"{local}@{domain}" if local and domain else None
+
+
+def normalize_domain(value):
+    """
+    Bare registrable-looking host from an email, URL or domain string.
+    """
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+    if "@" in value:
+        value = value.rsplit("@", 1)[1]
+    host = urlsplit(value if "//" in value else f"//{value}").hostname or ""
+    host = host.removeprefix("www.")
+    return host or None
+
+
+def normalize_linkedin(url):
+    """
+    Canonical linkedin.com/in/<slug> path without scheme, www, query or trailing slash.
+    """
+    url = (url or "").strip().lower()
+    if not url:
+        return None
+    parts = urlsplit(url if "//" in url else f"//{url}")
+    host = (parts.hostname or "").removeprefix("www.")
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" if host and path else None
+
+
+def normalize_company(name):
+    """
+    Lowercase alphanumeric tokens with legal suffixes (Inc, LLC, ...) removed.
+    """
+    tokens = re.findall(r"[a-z0-9]+", (name or "").lower())
+    while tokens and tokens[-1] in COMPANY_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens) or None
+
+
+def _hash(kind, value):
+    # 63-bit key so it fits SQLite's signed INTEGER PRIMARY KEY
+    digest = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+def identity_keys(lead):
+    """
+    Hashed identity keys for a lead: email, LinkedIn URL and company+contact name.
+    A company domain alone is not identifying, so it is only used together with
+    the contact name when no company name is present.
+    """
+    keys = []
+    email = normalize_email(lead.get("email"))
+    if email:
+        keys.append(_hash("email", email))
+    linkedin = normalize_linkedin(lead.get("linkedin"))
+    if linkedin:
+        keys.append(_hash("linkedin", linkedin))
+    contact = " ".join(re.findall(r"[a-z0-9]+", (lead.get("contact_name") or lead.get("contact") or "").lower()))
+    company = normalize_company(lead.get("company")) or normalize_domain(lead.get("domain") or lead.get("website"))
+    if contact and company:
+        keys.append(_hash("person", f"{company}|{contact}"))
+    return keys
+
+
+class IdentityIndex:
+    """
+    IdentityIndex:
+    Persistent (SQLite) index resolving leads to identities through hashed,
+    normalized keys, used to dedup leads across providers and runs and to
+    suppress leads that were already contacted. Keys are the integer primary
+    key of their table, so each lookup is a single B-tree probe.
+    """
+
+    def __init__(self, path="identity_index.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS identity_keys (key INTEGER PRIMARY KEY, identity INTEGER NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS identities (id INTEGER PRIMARY KEY, contacted INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.commit()
+
+    def _lookup(self, keys):
+        for key in keys:
+            row = self.conn.execute("SELECT identity FROM identity_keys WHERE key = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def resolve(self, lead):
+        """
+        Return the identity id of a previously seen lead, or None.
+        """
+        keys = identity_keys(lead)
+        with self.lock:
+            return self._lookup(keys)
+
+    def add(self, lead, commit=True):
+        """
+        Record a lead, attaching any new keys to its (possibly new) identity.
+        Returns (identity id, whether the identity was already known).
+        """
+        keys = identity_keys(lead)
+        if not keys:
+            return None, False
+        with self.lock:
+            identity = self._lookup(keys)
+            known = identity is not None
+            if not known:
+                identity = self.conn.execute("INSERT INTO identities (contacted) VALUES (0)").lastrowid
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO identity_keys (key, identity) VALUES (?, ?)",
+                [(key, identity) for key in keys],
+            )
+            if commit:
+                self.conn.commit()
+        return identity, known
+
+    def mark_contacted(self, lead):
+        """
+        Flag a lead's identity as contacted so later runs suppress it.
+        """
+        identity, _ = self.add(lead, commit=False)
+        if identity is None:
+            return
+        with self.lock:
+            self.conn.execute("UPDATE identities SET contacted = 1 WHERE id = ?", (identity,))
+            self.conn.commit()
+
+    def is_contacted(self, lead):
+        identity = self.resolve(lead)
+        if identity is None:
+            return False
+        with self.lock:
+            row = self.conn.execute("SELECT contacted FROM identities WHERE id = ?", (identity,)).fetchone()
+        return bool(row and row[0])
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+def dedupe_leads(leads, index=None, suppress_contacted=True, skip_seen=False):
+    """
+    Generator yielding each distinct lead once, matching on normalized email,
+    LinkedIn URL or company+contact name. Leads with no identifying fields are
+    always kept. With an IdentityIndex, leads are also recorded for later runs,
+    already-contacted leads are dropped (suppress_contacted) and, with
+    skip_seen, so is any lead seen in an earlier run.
+    """
+    seen = set()
+    for count, lead in enumerate(leads, start=1):
+        if index is not None and count % 1000 == 0:
+            index.commit()
+        keys = identity_keys(lead)
+        if not keys:
+            yield lead
+            continue
+        if not seen.isdisjoint(keys):
+            continue
+        seen.update(keys)
+        if index is not None:
+            if suppress_contacted and index.is_contacted(lead):
+                continue
+            _, known = index.add(lead, commit=False)
+            if skip_seen and known:
+                continue
+        yield lead
+    if index is not None:
+        index.commit()
@@ -0,0 +1,366 @@
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """
+    Histogram:
+    Fixed-bucket latency histogram (Prometheus style). Memory is constant
+    however many values are observed; quantiles are interpolated within buckets.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        """
+        Add another histogram's observations (same bounds) into this one.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """
+        Estimated q-quantile (0 < q <= 1), or 0.0 with no observations.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p90": round(self.quantile(0.9), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "buckets": dict(zip([str(b) for b in self.bounds] + ["+Inf"], self.counts)),
+        }
+
+
+class Call:
+    """
+    One external call in progress; fill in what is known before the block exits.
+    """
+
+    __slots__ = ("status", "bytes_sent", "bytes_received", "tokens")
+
+    def __init__(self):
+        self.status = "ok"
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.tokens = 0
+
+    def record_response(self, response):
+        """
+        Take the status code and payload sizes from a requests.Response.
+        """
+        self.status = str(getattr(response, "status_code", self.status))
+        self.bytes_received += len(getattr(response, "content", b"") or b"")
+        body = getattr(getattr(response, "request", None), "body", None)
+        if body:
+            self.bytes_sent += len(body)
+
+
+class Step:
+    """
+    One workflow step in progress; agents or the runner add to the lead counts.
+    """
+
+    __slots__ = ("leads_in", "leads_out")
+
+    def __init__(self):
+        self.leads_in = 0
+        self.leads_out = 0
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def _format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+
+class Metrics:
+    """
+    Metrics:
+    Thread-safe registry of counters and latency histograms for workflow steps
+    and external calls. Agents record through call(), retry() and cache();
+    the runner wraps each step in step(). Exports to JSON or Prometheus text
+    and renders an end-of-run summary table. Registries pickle (without their
+    lock), so worker processes can return theirs to be merged.
+
+    Metric names:
+        step_seconds_total, step_leads_in_total, step_leads_out_total {step, agent}
+        <kind>_requests_total {provider, status}      kind is "http" or "llm"
+        <kind>_request_seconds (histogram) {provider}
+        <kind>_retries_total, <kind>_bytes_sent_total, <kind>_bytes_received_total {provider}
+        llm_tokens_total {provider}
+        cache_requests_total {cache, result}
+        search_provider_failures_total {provider, reason}
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def call(self, kind, provider):
+        """
+        Time one external call and count it by status, e.g.
+
+            with metrics.call("http", "apollo") as call:
+                response = requests.post(...)
+                call.record_response(response)
+
+        An exception leaving the block is counted with status "error" (unless
+        a status code was already recorded) and re-raised.
+        """
+        call = Call()
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            if call.status == "ok":
+                call.status = "error"
+            raise
+        finally:
+            self.observe(f"{kind}_request_seconds", time.perf_counter() - start, provider=provider)
+            self.inc(f"{kind}_requests_total", provider=provider, status=call.status)
+            if call.bytes_sent:
+                self.inc(f"{kind}_bytes_sent_total", call.bytes_sent, provider=provider)
+            if call.bytes_received:
+                self.inc(f"{kind}_bytes_received_total", call.bytes_received, provider=provider)
+            if call.tokens:
+                self.inc(f"{kind}_tokens_total", call.tokens, provider=provider)
+
+    def retry(self, kind, provider, count=1):
+        self.inc(f"{kind}_retries_total", count, provider=provider)
+
+    def cache(self, name, hit):
+        self.inc("cache_requests_total", cache=name, result="hit" if hit else "miss")
+
+    @contextmanager
+    def step(self, step_id, agent):
+        """
+        Record a step's wall time and the lead counts set on the yielded Step.
+        """
+        step = Step()
+        start = time.perf_counter()
+        try:
+            yield step
+        finally:
+            self.inc("step_seconds_total", time.perf_counter() - start, step=step_id, agent=agent)
+            self.inc("step_leads_in_total", step.leads_in, step=step_id, agent=agent)
+            self.inc("step_leads_out_total", step.leads_out, step=step_id, agent=agent)
+
+    def __getstate__(self):
+        with self.lock:
+            return {"counters": dict(self.counters), "histograms": dict(self.histograms), "started_at": self.started_at}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def merge(self, other):
+        """
+        Add another registry's counters and histograms into this one, e.g. the
+        metrics returned by each worker process of a multi-process run.
+        """
+        state = other.__getstate__()
+        with self.lock:
+            for key, value in state["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, histogram in state["histograms"].items():
+                mine = self.histograms.get(key)
+                if mine is None:
+                    mine = self.histograms[key] = Histogram(histogram.bounds)
+                mine.merge(histogram)
+            self.started_at = min(self.started_at, state["started_at"])
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started_at = time.time()
+
+    def _values(self, name):
+        """
+        {labels dict as tuple: value} for one counter name.
+        """
+        with self.lock:
+            return {labels: value for (n, labels), value in self.counters.items() if n == name}
+
+    def snapshot(self):
+        """
+        JSON-serializable view of every counter and histogram.
+        """
+        with self.lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+        return {
+            "started_at": self.started_at,
+            "elapsed_seconds": round(time.time() - self.started_at, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self):
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip(list(histogram.bounds) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """
+        Write metrics to path: Prometheus text for .prom/.txt, JSON otherwise.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+    def summary(self):
+        """
+        Plain-text table of steps, external calls and caches.
+        """
+        lines = []
+        seconds = self._values("step_seconds_total")
+        if seconds:
+            leads_in = self._values("step_leads_in_total")
+            leads_out = self._values("step_leads_out_total")
+            lines.append(f"{'step':<24}{'agent':<24}{'wall s':>9}{'leads in':>10}{'leads out':>11}")
+            for labels, value in seconds.items():
+                names = dict(labels)
+                lines.append(f"{names['step']:<24}{names['agent']:<24}{value:>9.2f}"
+                             f"{leads_in.get(labels, 0):>10}{leads_out.get(labels, 0):>11}")
+
+        calls = {}
+        for kind in ("http", "llm"):
+            for labels, value in self._values(f"{kind}_requests_total").items():
+                names = dict(labels)
+                entry = calls.setdefault((kind, names["provider"]), {"calls": 0, "errors": 0})
+                entry["calls"] += value
+                if not names["status"].startswith(("ok", "2")):
+                    entry["errors"] += value
+        if calls:
+            lines.append("")
+            lines.append(f"{'call':<24}{'calls':>8}{'errors':>8}{'retries':>9}{'p50 s':>9}{'p99 s':>9}{'bytes in':>10}{'bytes out':>11}")
+            for (kind, provider), entry in sorted(calls.items()):
+                labels = (("provider", provider),)
+                with self.lock:
+                    histogram = self.histograms.get((f"{kind}_request_seconds", labels)) or Histogram()
+                retries = self._values(f"{kind}_retries_total").get(labels, 0)
+                received = self._values(f"{kind}_bytes_received_total").get(labels, 0)
+                sent = self._values(f"{kind}_bytes_sent_total").get(labels, 0)
+                lines.append(f"{kind + ':' + provider:<24}{entry['calls']:>8}{entry['errors']:>8}{retries:>9}"
+                             f"{histogram.quantile(0.5):>9.3f}{histogram.quantile(0.99):>9.3f}"
+                             f"{_format_bytes(received):>10}{_format_bytes(sent):>11}")
+
+        failures = self._values("search_provider_failures_total")
+        if failures:
+            lines.append("")
+            lines.append(f"{'failed search provider':<24}{'reason':<10}{'count':>8}")
+            for labels, value in sorted(failures.items()):
+                names = dict(labels)
+                lines.append(f"{names['provider']:<24}{names['reason']:<10}{value:>8}")
+
+        caches = {}
+        for labels, value in self._values("cache_requests_total").items():
+            names = dict(labels)
+            caches.setdefault(names["cache"], {"hit": 0, "miss": 0})[names["result"]] += value
+        if caches:
+            lines.append("")
+            lines.append(f"{'cache':<24}{'hits':>8}{'misses':>8}{'hit rate':>10}")
+            for name, entry in sorted(caches.items()):
+                total = entry["hit"] + entry["miss"]
+                lines.append(f"{name:<24}{entry['hit']:>8}{entry['miss']:>8}{entry['hit'] / total:>10.1%}")
+        return "\n".join(lines)
+
+
+# Process-wide registry used by agents that are not given their own
+_metrics = Metrics()
+
+
+def get_metrics():
+    return _metrics
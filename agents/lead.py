@@ -0,0 +1,126 @@
+import time
+from dataclasses import dataclass, fields
+
+@dataclass(slots=True)
+class Lead:
+    """
+    Lead:
+    Compact typed lead record passed between agents instead of a free-form dict.
+    Uses __slots__ (no per-instance __dict__) and supports the dict-style access
+    the agents already use (lead.get("role"), lead["score"] = ...), including
+    the "contact" alias for contact_name. Keys that are not fields go to `extra`.
+    Provenance: `source` is the provider that returned the lead, `fetched_at`
+    and `enriched_at` are epoch seconds.
+    """
+
+    company: str = None
+    contact_name: str = None
+    email: str = None
+    linkedin: str = None
+    signal: str = None
+    role: str = None
+    technologies: list = None
+    employee_count: int = None
+    revenue: float = None
+    score: float = None
+    source: str = None
+    fetched_at: float = None
+    enriched_at: float = None
+    extra: dict = None
+
+    ALIASES = {"contact": "contact_name", "company_name": "company"}
+
+    @classmethod
+    def field_names(cls):
+        return tuple(f.name for f in fields(cls) if f.name != "extra")
+
+    @classmethod
+    def from_dict(cls, data, **overrides):
+        """
+        Build a Lead from a dict (e.g. a provider row or a checkpointed lead).
+        """
+        lead = cls(**overrides)
+        for key, value in data.items():
+            if key not in overrides:
+                lead[key] = value
+        return lead
+
+    @classmethod
+    def coerce(cls, lead):
+        """
+        Return lead unchanged if it is already a Lead, otherwise convert it.
+        """
+        return lead if isinstance(lead, cls) else cls.from_dict(lead)
+
+    def _name(self, key):
+        return self.ALIASES.get(key, key)
+
+    def get(self, key, default=None):
+        """
+        dict.get equivalent; unset (None) fields return the default.
+        """
+        name = self._name(key)
+        if name in _FIELDS:
+            value = getattr(self, name)
+        else:
+            value = (self.extra or {}).get(name)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        name = self._name(key)
+        if name in _FIELDS:
+            return getattr(self, name)
+        if self.extra is None or name not in self.extra:
+            raise KeyError(key)
+        return self.extra[name]
+
+    def __setitem__(self, key, value):
+        name = self._name(key)
+        if name in _FIELDS:
+            setattr(self, name, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def keys(self):
+        """
+        Names of the fields that are set, so dict(lead) and {**lead} work.
+        """
+        names = [name for name in _FIELDS if getattr(self, name) is not None]
+        return names + list(self.extra or ())
+
+    def to_dict(self):
+        """
+        Plain dict of the set fields (plus extras), for JSON output.
+        """
+        return {key: self[key] for key in self.keys()}
+
+    def to_row(self):
+        """
+        Positional tuple in field_names() order plus extras, a compact
+        serialization for bulk storage.
+        """
+        return tuple(getattr(self, name) for name in _FIELDS) + (self.extra,)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+    def mark_enriched(self):
+        self.enriched_at = time.time()
+
+
+_FIELDS = Lead.field_names()
+
+
+def to_jsonable(obj):
+    """
+    json.dump default hook: serialize Lead records as plain dicts.
+    """
+    if isinstance(obj, Lead):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
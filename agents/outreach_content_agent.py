@@ -1,22 +1,53 @@
 import os
+import json
+import time
+import random
+import threading
 import openai
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.instrumentation import get_metrics
+from agents.prompt_cache import PromptCache
 
 class OutreachContentAgent:
     """
     OutreachContentAgent:
     Generates personalized outreach emails for ranked leads using OpenAI GPT.
+    Emails can be generated concurrently (max_concurrency) and several leads can
+    share one completion request (batch_size). Rate-limit (429) errors trigger a
+    shared exponential backoff that pauses all workers.
+    An optional PromptCache returns earlier completions for identical prompts;
+    bypass_cache=True forces fresh completions (which still refresh the cache).
+    An optional rate_limiter (e.g. a TokenBucket) paces completion requests.
     """
 
-    def __init__(self, openai_api_key=None, model="gpt-4o-mini"):
+    def __init__(self, openai_api_key=None, model="gpt-4o-mini", max_concurrency=1,
+                 batch_size=1, max_retries=5, base_backoff=1.0, temperature=0.7,
+                 cache=None, bypass_cache=False, metrics=None, rate_limiter=None):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_KEY")
         self.model = model
+        self.temperature = temperature
+        self.cache = cache
+        self.bypass_cache = bypass_cache
+        self.metrics = metrics or get_metrics()
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.batch_size = max(1, int(batch_size))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.last_run_stats = {}
+        self._lock = threading.Lock()
+        self._backoff_until = 0.0
+        self._backoff = base_backoff
+        self._latencies = []
+        self._tokens = 0
         openai.api_key = self.openai_api_key
 
-    def generate_email(self, lead, persona="SDR", tone="friendly"):
+    def build_prompt(self, lead, persona="SDR", tone="friendly"):
         """
-        Generate a personalized email for a single lead.
+        Build the generation prompt for a single lead.
         """
-        prompt = f"""
+        return f"""
 You are a {persona} writing a {tone} outreach email.
 
 Lead details:
@@ -27,30 +58,182 @@ Lead details:
 
 Write a concise, personalized email introducing your company, and suggest a next step for a call or demo.
 """
+
+    def build_batch_prompt(self, leads, persona="SDR", tone="friendly"):
+        """
+        Build one prompt asking for an email per lead, returned as a JSON array.
+        """
+        details = "\n".join(
+            f"{i + 1}. Name: {lead.get('contact')}; Company: {lead.get('company')}; "
+            f"Role: {lead.get('role')}; Technologies: {', '.join(lead.get('technologies', []))}"
+            for i, lead in enumerate(leads)
+        )
+        return f"""
+You are a {persona} writing {tone} outreach emails.
+
+Leads:
+{details}
+
+For each lead, write a concise, personalized email introducing your company, and suggest a next step for a call or demo.
+Respond with only a JSON array of {len(leads)} strings, one email body per lead, in the same order.
+"""
+
+    @staticmethod
+    def _is_rate_limit(error):
+        status = getattr(error, "status_code", None) or getattr(error, "http_status", None)
+        return status == 429 or type(error).__name__ == "RateLimitError"
+
+    @staticmethod
+    def _create_completion(**params):
+        # openai>=1.0 (as pinned in requirements.txt) exposes a module-level
+        # client; older releases only have the ChatCompletion resource
+        if hasattr(openai, "chat"):
+            return openai.chat.completions.create(**params)
+        return openai.ChatCompletion.create(**params)
+
+    def _complete(self, prompt, max_tokens):
+        """
+        Run one chat completion, retrying 429s with a backoff shared by all workers.
+        """
+        params = {"model": self.model, "temperature": self.temperature, "max_tokens": max_tokens}
+        if not self.bypass_cache:
+            cached = self._cache_get(prompt, params)
+            if cached is not None:
+                return cached
+
+        for attempt in range(self.max_retries + 1):
+            wait = self._backoff_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.monotonic()
+            try:
+                with self.metrics.call("llm", "openai") as call:
+                    call.bytes_sent = len(prompt.encode("utf-8"))
+                    response = self._create_completion(
+                        model=self.model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=self.temperature,
+                        max_tokens=max_tokens
+                    )
+                    usage = getattr(response, "usage", None)
+                    call.tokens = getattr(usage, "total_tokens", 0) or 0
+                    call.bytes_received = len((response.choices[0].message.content or "").encode("utf-8"))
+            except Exception as e:
+                if not self._is_rate_limit(e) or attempt == self.max_retries:
+                    raise
+                self.metrics.retry("llm", "openai")
+                with self._lock:
+                    # Double the pause on consecutive 429s, with jitter
+                    delay = self._backoff * (1 + random.random())
+                    self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+                    self._backoff = min(self._backoff * 2, 60.0)
+                print(f"[OpenAI Rate Limit]: backing off {delay:.1f}s")
+                continue
+
+            with self._lock:
+                self._backoff = self.base_backoff
+                self._latencies.append(time.monotonic() - start)
+                self._tokens += getattr(usage, "completion_tokens", 0) or 0
+            content = response.choices[0].message.content.strip()
+            self._cache_set(prompt, content, params)
+            return content
+
+    def _cache_get(self, prompt, params):
+        if self.cache is None:
+            return None
         try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=250
-            )
-            email_body = response.choices[0].message.content.strip()
-            return email_body
+            return self.cache.get(prompt, **params)
+        except Exception as e:
+            print(f"[Prompt Cache Error]: {e}")
+            return None
+
+    def _cache_set(self, prompt, content, params):
+        if self.cache is None:
+            return
+        try:
+            self.cache.set(prompt, content, **params)
+        except Exception as e:
+            print(f"[Prompt Cache Error]: {e}")
+
+    def generate_email(self, lead, persona="SDR", tone="friendly"):
+        """
+        Generate a personalized email for a single lead.
+        """
+        prompt = self.build_prompt(lead, persona, tone)
+        try:
+            return self._complete(prompt, max_tokens=250)
         except Exception as e:
             print(f"[OpenAI API Error]: {e}")
             return "Could not generate email."
 
+    def generate_batch(self, leads, persona="SDR", tone="friendly"):
+        """
+        Generate emails for several leads with a single completion request.
+        Falls back to per-lead generation if the reply can't be parsed.
+        """
+        if len(leads) == 1:
+            return [self.generate_email(leads[0], persona, tone)]
+        prompt = self.build_batch_prompt(leads, persona, tone)
+        try:
+            content = self._complete(prompt, max_tokens=250 * len(leads))
+            content = content.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+            bodies = json.loads(content)
+            if not isinstance(bodies, list) or len(bodies) != len(leads):
+                raise ValueError(f"expected {len(leads)} emails, got {len(bodies) if isinstance(bodies, list) else 'non-list'}")
+            return [str(body).strip() for body in bodies]
+        except Exception as e:
+            print(f"[OpenAI Batch Error]: {e}; falling back to per-lead generation")
+            return [self.generate_email(lead, persona, tone) for lead in leads]
+
+    def _percentile(self, values, pct):
+        if not values:
+            return 0.0
+        values = sorted(values)
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
     def run(self, ranked_leads, persona="SDR", tone="friendly"):
         """
-        Generate emails for all leads.
+        Generate emails for all leads, preserving lead order.
         """
+        ranked_leads = list(ranked_leads)
+        batches = [ranked_leads[i:i + self.batch_size] for i in range(0, len(ranked_leads), self.batch_size)]
+        self._latencies = []
+        self._tokens = 0
+        start = time.monotonic()
+
+        if self.max_concurrency == 1:
+            bodies = [self.generate_batch(batch, persona, tone) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                bodies = list(pool.map(lambda batch: self.generate_batch(batch, persona, tone), batches))
+
         messages = []
-        for lead in ranked_leads:
-            email_body = self.generate_email(lead, persona, tone)
-            messages.append({
-                "lead": lead.get("email"),
-                "email_body": email_body
-            })
+        for batch, batch_bodies in zip(batches, bodies):
+            for lead, email_body in zip(batch, batch_bodies):
+                messages.append({
+                    "lead": lead.get("email"),
+                    "email_body": email_body
+                })
+
+        elapsed = time.monotonic() - start
+        self.last_run_stats = {
+            "emails": len(messages),
+            "requests": len(self._latencies),
+            "elapsed_seconds": round(elapsed, 3),
+            "tokens_per_second": round(self._tokens / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_p50": round(self._percentile(self._latencies, 50), 3),
+            "latency_p90": round(self._percentile(self._latencies, 90), 3),
+            "latency_p99": round(self._percentile(self._latencies, 99), 3),
+        }
+        if self.cache is not None:
+            self.last_run_stats["cache"] = self.cache.stats()
+        if messages:
+            print(f"[Outreach Content] {len(messages)} emails in {elapsed:.2f}s, "
+                  f"{self.last_run_stats['tokens_per_second']} tokens/s, "
+                  f"p50 {self.last_run_stats['latency_p50']}s, p99 {self.last_run_stats['latency_p99']}s")
         return messages
 
 
@@ -67,7 +250,7 @@ if __name__ == "__main__":
         }
     ]
 
-    agent = OutreachContentAgent()
+    agent = OutreachContentAgent(max_concurrency=4, cache=PromptCache(path=".cache/prompt_cache.sqlite"))
     messages = agent.run(sample_leads)
     for msg in messages:
         print(msg)
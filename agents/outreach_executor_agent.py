@@ -1,30 +1,54 @@
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.http_client import get_http_client
+from agents.instrumentation import get_metrics
+from agents.send_ledger import SendLedger
 
 class OutreachExecutorAgent:
     """
     OutreachExecutorAgent:
     Sends personalized outreach emails via Apollo API or SendGrid and logs delivery status.
+    Sends reuse the shared pooled HTTP client, can run with up to max_in_flight
+    concurrent requests, and can be grouped batch_size per request when a
+    batch endpoint is configured.
+    With a SendLedger, messages already delivered are skipped (status
+    "already_sent") and only new or previously failed messages are sent.
+    With an IdentityIndex, delivered leads are marked as contacted so future
+    prospect searches suppress them.
     """
 
-    def __init__(self, apollo_api_key=None, sendgrid_api_key=None):
+    def __init__(self, apollo_api_key=None, sendgrid_api_key=None, apollo_endpoint=None,
+                 batch_endpoint=None, max_in_flight=1, batch_size=1, timeout=30, ledger=None,
+                 identity_index=None, metrics=None, http_client=None):
         self.apollo_api_key = apollo_api_key or os.getenv("APOLLO_API_KEY")
         self.sendgrid_api_key = sendgrid_api_key or os.getenv("SENDGRID_API_KEY")
-        self.apollo_endpoint = "https://api.apollo.io/v1/campaigns/send_email"
+        self.apollo_endpoint = apollo_endpoint or "https://api.apollo.io/v1/campaigns/send_email"
+        self.batch_endpoint = batch_endpoint or os.getenv("APOLLO_BATCH_SEND_ENDPOINT")
         # If using SendGrid, you can add its endpoint here
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.batch_size = max(1, int(batch_size))
+        self.timeout = timeout
+        self.ledger = ledger
+        self.identity_index = identity_index
+        self.metrics = metrics or get_metrics()
+        # Keep-alive pool shared with the other agents so sends don't pay a
+        # TCP/TLS handshake each, and one Apollo budget across agents
+        self.http = http_client or get_http_client()
+        self.headers = {"Authorization": f"Bearer {self.apollo_api_key}"}
 
     def send_email_apollo(self, lead_email, subject, body):
         """
         Send a single email via Apollo API.
         """
-        headers = {"Authorization": f"Bearer {self.apollo_api_key}"}
         payload = {
             "to": lead_email,
             "subject": subject,
             "body": body
         }
         try:
-            response = requests.post(self.apollo_endpoint, json=payload, headers=headers)
+            response = self.http.post(self.apollo_endpoint, "apollo", json=payload, headers=self.headers,
+                                      timeout=self.timeout, metrics=self.metrics)
             response.raise_for_status()
             data = response.json()
             return {"lead": lead_email, "status": "sent", "campaign_id": data.get("campaign_id")}
@@ -32,16 +56,84 @@ class OutreachExecutorAgent:
             print(f"[Apollo API Error]: {e} for {lead_email}")
             return {"lead": lead_email, "status": "failed", "error": str(e)}
 
-    def run(self, messages, subject="Quick Introduction"):
+    def send_batch_apollo(self, messages, subject):
         """
-        Send all emails and return sent status for each.
+        Send several emails in one request to the batch endpoint.
+        Expects {"results": [{"to", "campaign_id", "status"?}, ...]} back, or a
+        single campaign_id for the whole batch. Returns one status per message.
         """
-        sent_status = []
+        payload = {
+            "emails": [
+                {"to": msg.get("lead"), "subject": subject, "body": msg.get("email_body")}
+                for msg in messages
+            ]
+        }
+        try:
+            response = self.http.post(self.batch_endpoint, "apollo", json=payload, headers=self.headers,
+                                      timeout=self.timeout, metrics=self.metrics)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            print(f"[Apollo API Error]: {e} for batch of {len(messages)}")
+            return [{"lead": msg.get("lead"), "status": "failed", "error": str(e)} for msg in messages]
+
+        results = {r.get("to"): r for r in data.get("results", [])}
+        statuses = []
         for msg in messages:
             lead_email = msg.get("lead")
-            body = msg.get("email_body")
-            status = self.send_email_apollo(lead_email, subject, body)
-            sent_status.append(status)
+            result = results.get(lead_email)
+            if result is None and not results and data.get("campaign_id"):
+                result = {"campaign_id": data.get("campaign_id")}
+            if result is None or result.get("status", "sent") != "sent":
+                error = (result or {}).get("error", "missing from batch response")
+                statuses.append({"lead": lead_email, "status": "failed", "error": error})
+            else:
+                statuses.append({"lead": lead_email, "status": "sent", "campaign_id": result.get("campaign_id")})
+        return statuses
+
+    def _send_group(self, group, subject):
+        if self.batch_endpoint and len(group) > 1:
+            statuses = self.send_batch_apollo(group, subject)
+        else:
+            statuses = [self.send_email_apollo(msg.get("lead"), subject, msg.get("email_body")) for msg in group]
+        if self.ledger is not None:
+            for msg, status in zip(group, statuses):
+                self.ledger.record(self.ledger.make_key(msg.get("lead"), subject, msg.get("email_body")), status)
+        return statuses
+
+    def run(self, messages, subject="Quick Introduction"):
+        """
+        Send all emails and return sent status for each, in message order.
+        """
+        messages = list(messages)
+        sent_status = [None] * len(messages)
+        pending = []
+        for i, msg in enumerate(messages):
+            previous = None
+            if self.ledger is not None:
+                previous = self.ledger.get(self.ledger.make_key(msg.get("lead"), subject, msg.get("email_body")))
+            if previous is not None and previous.get("status") == "sent":
+                sent_status[i] = {"lead": msg.get("lead"), "status": "already_sent",
+                                  "campaign_id": previous.get("campaign_id")}
+            else:
+                pending.append(i)
+
+        size = self.batch_size if self.batch_endpoint else 1
+        groups = [[messages[i] for i in pending[j:j + size]] for j in range(0, len(pending), size)]
+
+        if self.max_in_flight == 1:
+            results = [self._send_group(group, subject) for group in groups]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+                results = list(pool.map(lambda group: self._send_group(group, subject), groups))
+
+        statuses = [status for group_status in results for status in group_status]
+        for i, status in zip(pending, statuses):
+            sent_status[i] = status
+            if self.identity_index is not None and status.get("status") == "sent":
+                self.identity_index.mark_contacted({"email": status.get("lead")})
+        if self.ledger is not None and len(pending) < len(messages):
+            print(f"[Send Ledger] skipped {len(messages) - len(pending)} already delivered messages")
         return sent_status
 
 
@@ -54,7 +146,7 @@ if __name__ == "__main__":
         }
     ]
 
-    agent = OutreachExecutorAgent()
+    agent = OutreachExecutorAgent(ledger=SendLedger(path=".cache/send_ledger.jsonl"))
     results = agent.run(sample_messages)
     for res in results:
         print(res)
@@ -0,0 +1,38 @@
+import hashlib
+import json
+
+from agents.sqlite_cache import SQLiteCache
+
+class PromptCache(SQLiteCache):
+    """
+    PromptCache:
+    Content-addressed cache of LLM completions. Entries are keyed on a hash of
+    the whitespace-normalized prompt plus the generation parameters, with
+    per-entry TTL and LRU eviction.
+    """
+
+    table = "completions"
+
+    def __init__(self, path="prompt_cache.sqlite", ttl_seconds=30 * 24 * 3600, max_entries=50_000):
+        super().__init__(path, ttl_seconds, max_entries)
+
+    @staticmethod
+    def make_key(prompt, **params):
+        """
+        Hash the normalized prompt together with model/temperature/etc.
+        """
+        normalized = " ".join(prompt.split())
+        material = json.dumps({"prompt": normalized, **params}, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, prompt, **params):
+        """
+        Return the cached completion text, or None on a miss or expired entry.
+        """
+        return self.get_key(self.make_key(prompt, **params))
+
+    def set(self, prompt, completion, ttl_seconds=None, **params):
+        """
+        Store a completion for a prompt and its generation parameters.
+        """
+        self.set_key(self.make_key(prompt, **params), completion, ttl_seconds)
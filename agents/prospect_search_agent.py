@@ -1,42 +1,147 @@
 import os
-import requests
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from agents.http_client import get_http_client
+from agents.identity_index import dedupe_leads
+from agents.instrumentation import get_metrics
+from agents.lead import Lead
 
 class ProspectSearchAgent:
     """
     ProspectSearchAgent:
     Searches for B2B prospects using ICP (industry, location, revenue, employee count)
     and signals (recent funding, hiring for sales) from Clay and Apollo APIs.
+    Providers are queried concurrently and paginated; more can be added with
+    register_provider. Leads are deduplicated on normalized identity keys and,
+    with an IdentityIndex, across runs with already-contacted leads suppressed
+    (skip_seen=True also drops any lead returned by an earlier run).
     """
 
-    def __init__(self, clay_api_key=None, apollo_api_key=None):
+    def __init__(self, clay_api_key=None, apollo_api_key=None, provider_timeout=30,
+                 page_size=100, prefetch_pages=4, identity_index=None, metrics=None,
+                 http_client=None, skip_seen=False):
         self.clay_api_key = clay_api_key or os.getenv("CLAY_API_KEY")
         self.apollo_api_key = apollo_api_key or os.getenv("APOLLO_API_KEY")
         self.clay_endpoint = "https://api.clay.com/search"
         self.apollo_endpoint = "https://api.apollo.io/v1/mixed_search"
+        self.default_timeout = provider_timeout
+        self.page_size = page_size
+        self.prefetch_pages = prefetch_pages
+        self.identity_index = identity_index
+        self.skip_seen = skip_seen
+        self.metrics = metrics or get_metrics()
+        self.http = http_client or get_http_client()
+        self.providers = {}
+        self.provider_timeouts = {}
+        self.failed_providers = {}
+        self.cursors = {}
+        self.register_provider("clay", self.iter_clay_pages, paginated=True)
+        self.register_provider("apollo", self.iter_apollo_pages, paginated=True)
+
+    def _map_leads(self, data, source):
+        # Map to your output schema
+        fetched_at = time.time()
+        return [
+            Lead(
+                company=lead.get("company_name"),
+                contact_name=lead.get("contact_name"),
+                email=lead.get("email"),
+                linkedin=lead.get("linkedin"),
+                signal=lead.get("signal"),
+                source=source,
+                fetched_at=fetched_at,
+            )
+            for lead in data.get("results", [])
+        ]
+
+    def _iter_pages(self, name, endpoint, api_key, icp, signals, cursor=None):
+        """
+        Walk a provider's result pages, yielding (leads, next_cursor) per page.
+        Supports both cursor-style ("next_cursor") and page-style ("pagination")
+        responses. A cursor is a dict merged into the request payload, e.g.
+        {"cursor": "abc"} or {"page": 3}, so it can be used to resume later.
+        """
+        headers = {"Authorization": f"Bearer {api_key}"}
+        while True:
+            payload = {"icp": icp, "signals": signals, "per_page": self.page_size}
+            payload.update(cursor or {})
+            # Searches are read-only, so retrying the POST is safe
+            response = self.http.post(endpoint, name, json=payload, headers=headers, idempotent=True,
+                                      timeout=self.provider_timeouts[name], metrics=self.metrics)
+            response.raise_for_status()
+            data = response.json()
+            leads = self._map_leads(data, name)
+
+            cursor = None
+            pagination = data.get("pagination") or {}
+            if data.get("next_cursor"):
+                cursor = {"cursor": data["next_cursor"]}
+            elif pagination.get("page", 0) < pagination.get("total_pages", 0):
+                cursor = {"page": pagination["page"] + 1}
+
+            yield leads, cursor
+            if not leads or cursor is None:
+                return
+
+    def iter_clay_pages(self, icp, signals, cursor=None):
+        """
+        Yield (leads, next_cursor) for each Clay result page.
+        """
+        return self._iter_pages("clay", self.clay_endpoint, self.clay_api_key, icp, signals, cursor)
+
+    def iter_apollo_pages(self, icp, signals, cursor=None):
+        """
+        Yield (leads, next_cursor) for each Apollo result page.
+        """
+        return self._iter_pages("apollo", self.apollo_endpoint, self.apollo_api_key, icp, signals, cursor)
+
+    def _collect(self, name, icp, signals, max_leads=None, cursor=None, leads=None, stop=None):
+        """
+        Follow a provider's pages into `leads` (a new list by default). Once
+        `stop` is set no further page is requested; the pages gathered so far
+        stay in `leads`.
+        """
+        leads = [] if leads is None else leads
+        pages = self.providers[name](icp, signals, cursor)
+        try:
+            for page, _ in pages:
+                leads.extend(page)
+                if max_leads is not None and len(leads) >= max_leads:
+                    del leads[max_leads:]
+                    break
+                if stop is not None and stop.is_set():
+                    break
+        finally:
+            # Closing the page generator ends the provider's pagination
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+        return leads
+
+    def fetch_clay(self, icp, signals, max_leads=None):
+        """
+        Call Clay API to search for companies matching the ICP, following all pages.
+        Raises on HTTP or network errors.
+        """
+        return self._collect("clay", icp, signals, max_leads)
+
+    def fetch_apollo(self, icp, signals, max_leads=None):
+        """
+        Call Apollo API to search for companies/contacts, following all pages.
+        Raises on HTTP or network errors.
+        """
+        return self._collect("apollo", icp, signals, max_leads)
 
     def search_clay(self, icp, signals):
         """
         Call Clay API to search for companies matching the ICP.
         Returns list of leads.
         """
-        headers = {"Authorization": f"Bearer {self.clay_api_key}"}
-        payload = {"icp": icp, "signals": signals}
         try:
-            response = requests.post(self.clay_endpoint, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            # Map to your output schema
-            leads = [
-                {
-                    "company": lead.get("company_name"),
-                    "contact_name": lead.get("contact_name"),
-                    "email": lead.get("email"),
-                    "linkedin": lead.get("linkedin"),
-                    "signal": lead.get("signal"),
-                }
-                for lead in data.get("results", [])
-            ]
-            return leads
+            return self.fetch_clay(icp, signals)
         except Exception as e:
             print(f"[Clay API Error]: {e}")
             return []
@@ -46,38 +151,154 @@ class ProspectSearchAgent:
         Call Apollo API to search for companies/contacts.
         Returns list of leads.
         """
-        headers = {"Authorization": f"Bearer {self.apollo_api_key}"}
-        payload = {"icp": icp, "signals": signals}
         try:
-            response = requests.post(self.apollo_endpoint, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            leads = [
-                {
-                    "company": lead.get("company_name"),
-                    "contact_name": lead.get("contact_name"),
-                    "email": lead.get("email"),
-                    "linkedin": lead.get("linkedin"),
-                    "signal": lead.get("signal"),
-                }
-                for lead in data.get("results", [])
-            ]
-            return leads
+            return self.fetch_apollo(icp, signals)
         except Exception as e:
             print(f"[Apollo API Error]: {e}")
             return []
 
-    def run(self, icp, signals):
+    def register_provider(self, name, search_fn, timeout=None, paginated=False):
+        """
+        Add a lead source. All registered providers are queried concurrently.
+        search_fn(icp, signals) must return a list of leads and raise on failure.
+        With paginated=True, search_fn(icp, signals, cursor) must instead yield
+        (leads, next_cursor) pages like iter_clay_pages.
+        """
+        if not paginated:
+            plain_fn = search_fn
+
+            def search_fn(icp, signals, cursor=None):
+                yield plain_fn(icp, signals), None
+
+        self.providers[name] = search_fn
+        self.provider_timeouts[name] = timeout or self.default_timeout
+
+    def search_all(self, icp, signals, max_leads=None):
+        """
+        Query every registered provider concurrently, each bounded by its own timeout.
+        Returns {"leads": [...], "failed_providers": {provider: error}} so results
+        from healthy providers survive a slow or failing one. A provider that
+        times out or fails mid-crawl keeps the pages it returned before that
+        and stops paginating.
+        """
+        pool = ThreadPoolExecutor(max_workers=len(self.providers))
+        start = time.monotonic()
+        collected = {name: [] for name in self.providers}
+        stops = {name: threading.Event() for name in self.providers}
+        futures = {
+            name: pool.submit(self._collect, name, icp, signals, max_leads, None, collected[name], stops[name])
+            for name in self.providers
+        }
+
+        leads = []
+        failed_providers = {}
+        for name, future in futures.items():
+            remaining = self.provider_timeouts[name] - (time.monotonic() - start)
+            try:
+                future.result(timeout=max(0, remaining))
+            except FutureTimeoutError:
+                stops[name].set()
+                failed_providers[name] = (f"timed out after {self.provider_timeouts[name]}s "
+                                          f"({len(collected[name])} leads kept)")
+                self.metrics.inc("search_provider_failures_total", provider=name, reason="timeout")
+            except Exception as e:
+                failed_providers[name] = str(e)
+                self.metrics.inc("search_provider_failures_total", provider=name, reason="error")
+            leads.extend(list(collected[name]))
+
+        # Don't block on the page request still in flight for a timed-out provider
+        pool.shutdown(wait=False, cancel_futures=True)
+        for name, error in failed_providers.items():
+            print(f"[{name} search failed]: {error}")
+        return {"leads": leads, "failed_providers": failed_providers}
+
+    def stream_batches(self, icp, signals, max_leads=None, cursors=None):
+        """
+        Generator yielding {"provider", "leads", "cursor"} batches as pages arrive
+        from all providers concurrently. At most max_leads leads are yielded in
+        total. cursors ({provider: cursor}) resumes providers from a saved
+        position; the latest cursor per provider is kept in self.cursors
+        (None once a provider is exhausted).
+        """
+        cursors = dict(cursors or {})
+        self.cursors = dict(cursors)
+        self.failed_providers = {}
+        batches = queue.Queue(maxsize=self.prefetch_pages)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            # Bounded queue: producers wait here when the consumer falls behind
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def pump(name):
+            try:
+                for page, cursor in self.providers[name](icp, signals, cursors.get(name)):
+                    put((name, page, cursor))
+                    if stop.is_set():
+                        return
+            except Exception as e:
+                self.failed_providers[name] = str(e)
+                self.metrics.inc("search_provider_failures_total", provider=name, reason="error")
+                print(f"[{name} search failed]: {e}")
+            finally:
+                put((name, done, None))
+
+        workers = [threading.Thread(target=pump, args=(name,), daemon=True) for name in self.providers]
+        for worker in workers:
+            worker.start()
+
+        remaining = max_leads
+        active = len(workers)
+        try:
+            while active:
+                name, page, cursor = batches.get()
+                if page is done:
+                    active -= 1
+                    continue
+                self.cursors[name] = cursor
+                if remaining is not None:
+                    page = page[:remaining]
+                    remaining -= len(page)
+                if page:
+                    yield {"provider": name, "leads": page, "cursor": cursor}
+                if remaining is not None and remaining <= 0:
+                    return
+        finally:
+            stop.set()
+
+    def iter_leads(self, icp, signals, max_leads=None, cursors=None):
+        """
+        Generator yielding unique leads one at a time from stream_batches.
+        """
+        leads = (lead for batch in self.stream_batches(icp, signals, max_leads, cursors) for lead in batch["leads"])
+        yield from dedupe_leads(leads, self.identity_index, skip_seen=self.skip_seen)
+
+    def run(self, icp, signals, max_leads=None, cursors=None, stream=False):
         """
         Main method to run prospect search.
-        Returns combined leads from Clay and Apollo.
-        """
-        clay_leads = self.search_clay(icp, signals)
-        apollo_leads = self.search_apollo(icp, signals)
-        combined = clay_leads + apollo_leads
-        # Optional: deduplicate leads based on email or company
-        unique_leads = {lead['email']: lead for lead in combined}.values()
-        return list(unique_leads)
+        Returns combined leads from all providers (Clay and Apollo by default).
+        Providers that failed are recorded in self.failed_providers and counted
+        in the run metrics (search_provider_failures_total), so the workflow's
+        metrics report which provider's results are missing.
+        With stream=True a lead generator is returned instead, so downstream
+        steps can start on the first page while later pages are still loading.
+        """
+        if stream or cursors:
+            leads = self.iter_leads(icp, signals, max_leads, cursors)
+            return leads if stream else list(leads)
+
+        result = self.search_all(icp, signals, max_leads)
+        self.failed_providers = result["failed_providers"]
+        combined = result["leads"]
+        # Deduplicate on normalized email / LinkedIn / company+contact
+        unique_leads = list(dedupe_leads(combined, self.identity_index, skip_seen=self.skip_seen))
+        return unique_leads[:max_leads]
 
 
 # Example usage
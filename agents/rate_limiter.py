@@ -0,0 +1,84 @@
+import threading
+import time
+import multiprocessing
+
+class TokenBucket:
+    """
+    TokenBucket:
+    Thread-safe token-bucket rate limiter used to pace outbound API calls.
+    `rate` tokens are added per second, up to `capacity` tokens in reserve.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens without blocking. Returns True if they were available.
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """
+        Block until the requested number of tokens is available, then take them.
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    SharedTokenBucket:
+    TokenBucket whose state lives in shared memory, so every process it is
+    handed to (as a Process argument or pool initializer argument) draws from
+    one budget. Keeps an API quota when the workflow runs across processes.
+    """
+
+    def __init__(self, rate, capacity=None, context=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        # [tokens, updated_at]; time.monotonic() is system-wide, so it is
+        # comparable between processes
+        self._state = (context or multiprocessing).Array("d", [self.capacity, time.monotonic()])
+        self.lock = self._state.get_lock()
+
+    @property
+    def tokens(self):
+        return self._state[0]
+
+    @tokens.setter
+    def tokens(self, value):
+        self._state[0] = value
+
+    @property
+    def updated_at(self):
+        return self._state[1]
+
+    @updated_at.setter
+    def updated_at(self, value):
+        self._state[1] = value
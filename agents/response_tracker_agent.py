@@ -1,27 +1,48 @@
 import os
-import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.event_store import EventStore
+from agents.http_client import get_http_client
+from agents.instrumentation import get_metrics
+from agents.rate_limiter import TokenBucket
 
 class ResponseTrackerAgent:
     """
     ResponseTrackerAgent:
     Monitors email responses, opens, clicks, and meeting bookings
     for sent campaigns using Apollo API.
+    Campaigns are polled concurrently under a shared rate limiter. With an
+    EventStore, only events newer than each campaign's high-water mark are
+    requested and merged into the store.
     """
 
-    def __init__(self, apollo_api_key=None):
+    def __init__(self, apollo_api_key=None, event_store=None, max_workers=4, requests_per_second=2.0,
+                 metrics=None, http_client=None, rate_limiter=None):
         self.apollo_api_key = apollo_api_key or os.getenv("APOLLO_API_KEY")
         self.tracking_endpoint = "https://api.apollo.io/v1/campaigns/responses"
+        self.event_store = event_store
+        self.metrics = metrics or get_metrics()
+        self.http = http_client or get_http_client()
+        self.max_workers = max(1, int(max_workers))
+        # Default pacing matches the previous fixed 0.5s delay between campaigns;
+        # a limiter passed in (e.g. shared between processes) replaces it
+        self.rate_limiter = rate_limiter or TokenBucket(requests_per_second, capacity=1)
 
-    def get_campaign_responses(self, campaign_id):
+    def get_campaign_responses(self, campaign_id, since=None):
         """
-        Fetch responses for a single campaign ID.
+        Fetch responses for a single campaign ID, optionally only those at or
+        after the `since` timestamp.
         """
         headers = {"Authorization": f"Bearer {self.apollo_api_key}"}
         params = {"campaign_id": campaign_id}
+        if since is not None:
+            params["since"] = since
 
         try:
-            response = requests.get(self.tracking_endpoint, headers=headers, params=params)
+            self.rate_limiter.acquire()  # Respect API rate limits
+            response = self.http.get(self.tracking_endpoint, "apollo", headers=headers, params=params,
+                                     metrics=self.metrics)
             response.raise_for_status()
             data = response.json()
             # Map to workflow schema
@@ -40,23 +61,47 @@ class ResponseTrackerAgent:
             print(f"[Apollo API Error]: {e} for campaign {campaign_id}")
             return []
 
+    def poll_campaign(self, campaign_id):
+        """
+        Fetch events newer than the campaign's high-water mark, merge them into
+        the event store and advance the mark. Returns the new events.
+        """
+        since = self.event_store.get_high_water(campaign_id)
+        responses = self.get_campaign_responses(campaign_id, since=since)
+        self.event_store.merge(campaign_id, responses)
+        timestamps = [r["timestamp"] for r in responses if r.get("timestamp") is not None]
+        if timestamps:
+            newest = max(timestamps) if since is None else max(max(timestamps), since)
+            self.event_store.set_high_water(campaign_id, newest)
+        return responses
+
     def run(self, campaign_ids):
         """
         Track responses for a list of campaign_ids.
+        With an event store, returns the merged view of those campaigns after
+        applying new events; otherwise the freshly fetched responses.
         """
-        all_responses = []
-        for cid in campaign_ids:
-            responses = self.get_campaign_responses(cid)
-            all_responses.extend(responses)
-            time.sleep(0.5)  # Respect API rate limits
-        return all_responses
+        campaign_ids = list(dict.fromkeys(campaign_ids))
+        fetch = self.poll_campaign if self.event_store is not None else self.get_campaign_responses
+        start = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(fetch, campaign_ids))
+
+        new_events = sum(len(r) for r in results)
+        print(f"[Response Tracker] {len(campaign_ids)} campaigns polled, "
+              f"{new_events} events fetched in {time.monotonic() - start:.2f}s")
+
+        if self.event_store is not None:
+            return self.event_store.responses(campaign_ids)
+        return [response for responses in results for response in responses]
 
 
 # Example usage
 if __name__ == "__main__":
     sample_campaign_ids = ["campaign_12345", "campaign_67890"]
 
-    agent = ResponseTrackerAgent()
+    agent = ResponseTrackerAgent(event_store=EventStore(path=".cache/events.sqlite"))
     responses = agent.run(sample_campaign_ids)
     for r in responses:
         print(r)
@@ -1,9 +1,22 @@
+import re
+import copy
+import heapq
+import numpy as np
+
 class ScoringAgent:
     """
     ScoringAgent:
     Scores enriched leads based on configurable ICP criteria and returns ranked leads.
+    score_batch/rank_batch score whole lead tables at once with NumPy and
+    produce the same scores as score_lead.
     """
 
+    # Example ICP preferences
+    EMPLOYEE_RANGE = (100, 1000)
+    REVENUE_RANGE = (20_000_000, 200_000_000)
+    PREFERRED_ROLES = ("CEO", "CTO", "VP Sales", "Founder")
+    DESIRED_TECH = ("Python", "Salesforce", "AWS")
+
     def __init__(self, scoring_criteria=None):
         """
         scoring_criteria: dict defining weights for scoring
@@ -21,6 +34,22 @@ class ScoringAgent:
             "role_match": 0.2,
             "tech_stack_match": 0.2
         }
+        # Precompile matchers once instead of rebuilding them for every lead
+        self.role_pattern = re.compile("|".join(re.escape(r.lower()) for r in self.PREFERRED_ROLES))
+        self.desired_tech = frozenset(self.DESIRED_TECH)
+
+    def _role_matches(self, role):
+        return self.role_pattern.search(role.lower()) is not None
+
+    def _tech_matches(self, technologies):
+        if isinstance(technologies, str):
+            return any(tech in technologies for tech in self.desired_tech)
+        try:
+            return not self.desired_tech.isdisjoint(technologies)
+        except TypeError:
+            # Unhashable items (e.g. PDL tech dicts) can't match a name;
+            # the membership scan compares them without hashing
+            return any(tech in technologies for tech in self.desired_tech)
 
     def score_lead(self, lead):
         """
@@ -30,32 +59,115 @@ class ScoringAgent:
 
         # Employee count score (example: prefer 100-1000)
         employee_count = lead.get("employee_count", 0)
-        if 100 <= employee_count <= 1000:
+        if self.EMPLOYEE_RANGE[0] <= employee_count <= self.EMPLOYEE_RANGE[1]:
             score += self.scoring_criteria["employee_count"]
 
         # Revenue score (example: prefer 20M-200M)
         revenue = lead.get("revenue", 0)
-        if 20_000_000 <= revenue <= 200_000_000:
+        if self.REVENUE_RANGE[0] <= revenue <= self.REVENUE_RANGE[1]:
             score += self.scoring_criteria["revenue"]
 
         # Role match (example: prefer "CEO", "CTO", "VP Sales")
-        preferred_roles = ["CEO", "CTO", "VP Sales", "Founder"]
-        role = lead.get("role", "").lower()
-        if any(r.lower() in role for r in preferred_roles):
+        if self._role_matches(lead.get("role", "")):
             score += self.scoring_criteria["role_match"]
 
         # Tech stack match (example: has Python, Salesforce)
-        desired_tech = ["Python", "Salesforce", "AWS"]
-        technologies = lead.get("technologies", [])
-        if any(tech in technologies for tech in desired_tech):
+        if self._tech_matches(lead.get("technologies", [])):
             score += self.scoring_criteria["tech_stack_match"]
 
         return score
 
-    def run(self, enriched_leads):
+    def score_columns(self, employee_count, revenue, roles, technologies):
+        """
+        Score a columnar lead table. employee_count and revenue are numeric
+        arrays; roles and technologies are sequences aligned with them.
+        Returns a float64 array of scores.
+        """
+        employee_count = np.asarray(employee_count, dtype=np.float64)
+        revenue = np.asarray(revenue, dtype=np.float64)
+
+        # Match each distinct role string once, then broadcast back to the rows
+        unique_roles, role_index = np.unique(np.asarray(roles, dtype=object).astype(str), return_inverse=True)
+        role_hits = np.fromiter((self._role_matches(r) for r in unique_roles), dtype=bool, count=len(unique_roles))
+        role_match = role_hits[role_index]
+
+        tech_match = np.fromiter((self._tech_matches(t) for t in technologies), dtype=bool, count=len(employee_count))
+
+        # Add weights in the same order as score_lead so float results are identical
+        scores = np.zeros(len(employee_count), dtype=np.float64)
+        scores += np.where((employee_count >= self.EMPLOYEE_RANGE[0]) & (employee_count <= self.EMPLOYEE_RANGE[1]),
+                           self.scoring_criteria["employee_count"], 0)
+        scores += np.where((revenue >= self.REVENUE_RANGE[0]) & (revenue <= self.REVENUE_RANGE[1]),
+                           self.scoring_criteria["revenue"], 0)
+        scores += np.where(role_match, self.scoring_criteria["role_match"], 0)
+        scores += np.where(tech_match, self.scoring_criteria["tech_stack_match"], 0)
+        return scores
+
+    def score_batch(self, leads):
+        """
+        Score a list of lead dicts at once. Returns a float64 array of scores.
+        """
+        return self.score_columns(
+            [lead.get("employee_count", 0) for lead in leads],
+            [lead.get("revenue", 0) for lead in leads],
+            [lead.get("role", "") for lead in leads],
+            [lead.get("technologies", []) for lead in leads],
+        )
+
+    def rank_order(self, scores):
+        """
+        Indices that sort scores descending; ties keep their input order.
+        """
+        return np.argsort(-np.asarray(scores), kind="stable")
+
+    def rank_batch(self, enriched_leads):
+        """
+        Vectorized equivalent of run: sets "score" on each lead and returns
+        them ranked by descending score.
+        """
+        enriched_leads = list(enriched_leads)
+        scores = self.score_batch(enriched_leads)
+        for lead, lead_score in zip(enriched_leads, scores.tolist()):
+            lead["score"] = lead_score
+        return [enriched_leads[i] for i in self.rank_order(scores)]
+
+    def top_k(self, leads, k=None, min_score=None):
+        """
+        Stream leads from any iterable and return [(score, lead), ...] for the
+        best k leads (all leads when k is None) scoring at least min_score,
+        highest first; ties keep their input order. Only a k-sized heap is
+        held in memory and the lead dicts are neither copied nor mutated.
+        """
+        if k is not None and k <= 0:
+            return []
+        heap = []
+        for index, lead in enumerate(leads):
+            lead_score = self.score_lead(lead)
+            if min_score is not None and lead_score < min_score:
+                continue
+            # (score, -index) orders the heap so its root is the weakest kept lead
+            entry = (lead_score, -index, lead)
+            if k is None or len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        return [(lead_score, lead) for lead_score, _, lead in sorted(heap, key=lambda e: e[:2], reverse=True)]
+
+    def run(self, enriched_leads, top_k=None, min_score=None):
         """
         Score all leads and return them sorted by descending score.
+        With top_k and/or min_score, leads are streamed through a bounded heap
+        instead and only the selected leads are returned, as shallow copies
+        that carry the score (the input leads are left untouched).
         """
+        if top_k is not None or min_score is not None:
+            ranked_leads = []
+            for lead_score, lead in self.top_k(enriched_leads, top_k, min_score):
+                lead = copy.copy(lead)
+                lead["score"] = lead_score
+                ranked_leads.append(lead)
+            return ranked_leads
+
         scored_leads = []
         for lead in enriched_leads:
             lead_score = self.score_lead(lead)
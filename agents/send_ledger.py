@@ -0,0 +1,74 @@
+import os
+import json
+import hashlib
+import threading
+
+class SendLedger:
+    """
+    SendLedger:
+    Append-only JSONL log of send attempts keyed by lead email and content hash.
+    The latest record per key is indexed in memory on open, so checking whether
+    a message was already delivered is a constant-time dict lookup.
+    """
+
+    def __init__(self, path="send_ledger.jsonl"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.index = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            self._load()
+        self.file = open(path, "a")
+
+    def _load(self):
+        good_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Torn last line from an interrupted write
+                self.index[record["key"]] = record
+                good_bytes += len(line)
+        # Drop the torn tail so later appends start on a clean line
+        if good_bytes != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_bytes)
+
+    @staticmethod
+    def make_key(lead_email, subject, body):
+        """
+        Key a message on the normalized recipient and a hash of its content.
+        """
+        content_hash = hashlib.sha256(f"{subject}\0{body}".encode("utf-8")).hexdigest()[:32]
+        return f"{(lead_email or '').strip().lower()}:{content_hash}"
+
+    def get(self, key):
+        """
+        Return the latest ledger record for key, or None if never attempted.
+        """
+        return self.index.get(key)
+
+    def is_delivered(self, key):
+        record = self.index.get(key)
+        return record is not None and record.get("status") == "sent"
+
+    def record(self, key, status):
+        """
+        Append a send result ({"lead", "status", ...}) for key.
+        """
+        record = {"key": key, **status}
+        line = json.dumps(record) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            self.index[key] = record
+
+    def close(self):
+        with self.lock:
+            self.file.close()
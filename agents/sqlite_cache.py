@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from agents.instrumentation import get_metrics
+
+class SQLiteCache:
+    """
+    SQLiteCache:
+    Disk-backed key/value cache of JSON values stored in a SQLite table.
+    Entries expire after a TTL and the least recently used entries are evicted
+    once the cache grows past max_entries. The size is read from the table on
+    each eviction check, so the cap holds when several processes share the file.
+    Hits and misses are also counted in the process metrics under the table name.
+    """
+
+    table = "cache"
+
+    def __init__(self, path="cache.sqlite", ttl_seconds=7 * 24 * 3600, max_entries=100_000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.metrics = get_metrics()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_access ON {self.table}(last_access)")
+        self.conn.commit()
+
+    def get_key(self, key):
+        """
+        Return the cached value for key, or None on a miss or expired entry.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self.conn.commit()
+                self.misses += 1
+                self.metrics.cache(self.table, hit=False)
+                return None
+            self.conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        self.metrics.cache(self.table, hit=True)
+        return json.loads(row[0])
+
+    def set_key(self, key, value, ttl_seconds=None):
+        """
+        Store a value, evicting least recently used entries if needed.
+        """
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self.lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        # Counted inside the write transaction, so concurrent writers see each other's rows
+        size = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self.conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def purge_expired(self):
+        """
+        Remove all expired entries. Returns the number of rows deleted.
+        """
+        with self.lock:
+            cur = self.conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),))
+            self.conn.commit()
+            return cur.rowcount
+
+    def stats(self):
+        """
+        Return hit/miss counters and the current hit rate.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,223 @@
+import os
+import hmac
+import json
+import asyncio
+from collections import defaultdict
+
+from agents.event_store import EventStore
+
+class WebhookReceiver:
+    """
+    WebhookReceiver:
+    Small asyncio HTTP server that receives open, click, reply and meeting
+    webhooks as a push alternative to polling Apollo. Events are normalized
+    into the get_campaign_responses schema and written to the EventStore in
+    batches (every batch_size events or flush_interval seconds).
+    Malformed requests get 400 and bodies over max_body_bytes get 413; both
+    close the connection, since the rest of the stream can't be framed.
+    """
+
+    EVENT_FLAGS = {
+        "open": "opened",
+        "opened": "opened",
+        "click": "clicked",
+        "clicked": "clicked",
+        "reply": "replied",
+        "replied": "replied",
+        "meeting": "meeting_booked",
+        "meeting_booked": "meeting_booked",
+    }
+
+    def __init__(self, event_store, host="127.0.0.1", port=8085, batch_size=500,
+                 flush_interval=1.0, secret=None, max_body_bytes=1024 * 1024):
+        self.event_store = event_store
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.secret = secret or os.getenv("WEBHOOK_SECRET")
+        self.max_body_bytes = max_body_bytes
+        self.buffer = defaultdict(list)
+        self.buffered = 0
+        self.received = 0
+        self.rejected = 0
+        self.server = None
+        self._flusher = None
+        self._flush_lock = None
+
+    def normalize(self, event):
+        """
+        Map a raw webhook event to (campaign_id, response dict).
+        Raises ValueError for unknown event types or missing or non-string
+        campaign_id and email.
+        """
+        flag = self.EVENT_FLAGS.get(str(event.get("event") or event.get("type") or "").lower())
+        if flag is None:
+            raise ValueError(f"unknown event type {event.get('event') or event.get('type')!r}")
+        campaign_id = event.get("campaign_id")
+        lead = event.get("email") or event.get("lead")
+        if not isinstance(campaign_id, str) or not isinstance(lead, str) or not campaign_id or not lead:
+            raise ValueError("event requires string campaign_id and email")
+        response = {
+            "lead": lead,
+            "opened": False,
+            "clicked": False,
+            "replied": False,
+            "meeting_booked": False,
+            "timestamp": event.get("timestamp"),
+        }
+        response[flag] = True
+        return campaign_id, response
+
+    async def flush(self):
+        """
+        Write buffered events to the event store off the event loop. If the
+        write fails the events are put back in the buffer for the next flush
+        (merging is idempotent, so campaigns already written are harmless).
+        """
+        async with self._flush_lock:
+            if not self.buffered:
+                return
+            buffer, buffered = self.buffer, self.buffered
+            self.buffer, self.buffered = defaultdict(list), 0
+            try:
+                await asyncio.to_thread(self._write, buffer)
+            except Exception:
+                # Keep the acknowledged events ahead of those buffered meanwhile
+                for campaign_id, responses in self.buffer.items():
+                    buffer[campaign_id].extend(responses)
+                self.buffer, self.buffered = buffer, buffered + self.buffered
+                raise
+
+    def _write(self, buffer):
+        for campaign_id, responses in buffer.items():
+            self.event_store.merge(campaign_id, responses)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[Webhook Flush Error]: {e}")
+
+    def ingest(self, payload):
+        """
+        Buffer one event or a list of events. Returns the number accepted.
+        """
+        events = payload if isinstance(payload, list) else [payload]
+        accepted = 0
+        for event in events:
+            try:
+                campaign_id, response = self.normalize(event)
+            except (ValueError, AttributeError):
+                self.rejected += 1
+                continue
+            self.buffer[campaign_id].append(response)
+            accepted += 1
+        self.buffered += accepted
+        self.received += accepted
+        return accepted
+
+    async def _respond(self, writer, status, body, close=False):
+        data = json.dumps(body).encode("utf-8")
+        reason = {202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+                  413: "Payload Too Large"}.get(status, "OK")
+        extra = "Connection: close\r\n" if close else ""
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n{extra}"
+            f"Content-Length: {len(data)}\r\n\r\n".encode("ascii") + data
+        )
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        """
+        Serve HTTP/1.1 keep-alive connections: POST a JSON event or list of events.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 400, {"error": "request head too large"}, close=True)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                request_line = lines[0].split(" ")
+                if len(request_line) < 3:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, close=True)
+                    break
+                method, path = request_line[:2]
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                length = headers.get("content-length", "0")
+                if not length.isdigit():
+                    await self._respond(writer, 400, {"error": "invalid Content-Length"}, close=True)
+                    break
+                if int(length) > self.max_body_bytes:
+                    await self._respond(writer, 413, {"error": f"body over {self.max_body_bytes} bytes"}, close=True)
+                    break
+                body = await reader.readexactly(int(length))
+
+                if method == "GET" and path == "/health":
+                    await self._respond(writer, 200, {"received": self.received, "rejected": self.rejected})
+                elif method != "POST":
+                    await self._respond(writer, 404, {"error": "not found"})
+                elif self.secret and not hmac.compare_digest(headers.get("x-webhook-token", "").encode("utf-8"),
+                                                             self.secret.encode("utf-8")):
+                    await self._respond(writer, 401, {"error": "invalid token"})
+                else:
+                    try:
+                        accepted = self.ingest(json.loads(body))
+                    except ValueError:
+                        # Invalid JSON or text that isn't UTF-8
+                        await self._respond(writer, 400, {"error": "invalid JSON"})
+                    else:
+                        await self._respond(writer, 202, {"accepted": accepted})
+                        if self.buffered >= self.batch_size:
+                            try:
+                                await self.flush()
+                            except Exception as e:
+                                # The events stay buffered for the periodic flush
+                                print(f"[Webhook Flush Error]: {e}")
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._flush_lock = asyncio.Lock()
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._flusher = asyncio.create_task(self._flush_periodically())
+        print(f"[Webhook Receiver] listening on http://{self.host}:{self.port}")
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.flush()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+
+# Example usage
+if __name__ == "__main__":
+    store = EventStore(path=os.getenv("EVENT_STORE_PATH", ".cache/events.sqlite"))
+    receiver = WebhookReceiver(store, port=int(os.getenv("WEBHOOK_PORT", "8085")))
+    try:
+        asyncio.run(receiver.serve_forever())
+    except KeyboardInterrupt:
+        print(f"Received {receiver.received} events")
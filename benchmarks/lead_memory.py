@@ -0,0 +1,70 @@
+"""
+Memory benchmark: free-form lead dicts vs agents.lead.Lead records.
+
+Builds N enriched leads both ways and reports traced bytes per lead and the
+peak while holding them all, e.g.
+
+    python -m benchmarks.lead_memory --leads 200000
+"""
+import time
+import argparse
+import tracemalloc
+
+from agents.lead import Lead
+
+
+def make_dict(i, now):
+    return {
+        "company": f"Company {i % 5000}",
+        "contact_name": f"Contact {i}",
+        "email": f"contact{i}@company{i % 5000}.com",
+        "linkedin": f"https://linkedin.com/in/contact{i}",
+        "signal": "recent_funding",
+        "source": "apollo",
+        "fetched_at": now,
+        "role": "CTO",
+        "technologies": ["Python", "AWS"],
+        "score": 0.7,
+    }
+
+
+def make_lead(i, now):
+    return Lead(
+        company=f"Company {i % 5000}",
+        contact_name=f"Contact {i}",
+        email=f"contact{i}@company{i % 5000}.com",
+        linkedin=f"https://linkedin.com/in/contact{i}",
+        signal="recent_funding",
+        source="apollo",
+        fetched_at=now,
+        role="CTO",
+        technologies=["Python", "AWS"],
+        score=0.7,
+    )
+
+
+def measure(factory, n):
+    now = time.time()
+    tracemalloc.start()
+    start = time.perf_counter()
+    leads = [factory(i, now) for i in range(n)]
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del leads
+    return current, peak, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lead record memory benchmark")
+    parser.add_argument("--leads", type=int, default=200_000)
+    args = parser.parse_args()
+
+    results = {}
+    for name, factory in (("dict", make_dict), ("Lead", make_lead)):
+        current, peak, elapsed = measure(factory, args.leads)
+        results[name] = current
+        print(f"{name:>5}: {current / args.leads:7.1f} bytes/lead, peak {peak / 2**20:7.1f} MiB, "
+              f"built in {elapsed:.2f}s")
+    saved = 1 - results["Lead"] / results["dict"]
+    print(f"Lead records use {saved:.0%} less memory than dicts for {args.leads} leads")
@@ -0,0 +1,309 @@
+"""
+Local stand-ins for the external services the agents call: Clay and Apollo
+search, People Data Labs enrichment, OpenAI chat completions, Apollo sending
+and response tracking, and Google Sheets appends.
+
+Each provider has configurable latency (with jitter), error rate and rate
+limit; requests over the limit get 429 with a Retry-After header. The server
+is a single asyncio process with HTTP/1.1 keep-alive so it can be run next to
+the agents without becoming the bottleneck.
+
+    python -m benchmarks.mock_services --leads 100000 --latency-ms 20 --error-rate 0.01
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import zlib
+from urllib.parse import urlsplit, parse_qs
+
+PROVIDERS = ("clay", "apollo", "pdl", "openai", "sheets")
+
+ROLES = ("CEO", "CTO", "VP Sales", "Founder", "Head of Marketing", "Engineering Manager", "Analyst")
+TECH = ("Python", "Salesforce", "AWS", "HubSpot", "Snowflake", "React", "Go")
+SIGNALS = ("recent_funding", "hiring_for_sales")
+
+
+def lead_record(i):
+    """
+    Deterministic synthetic lead i in the providers' search result schema.
+    """
+    company = i % 5000
+    return {
+        "company_name": f"Company {company}",
+        "contact_name": f"Contact {i}",
+        "email": f"contact{i}@company{company}.com",
+        "linkedin": f"https://linkedin.com/in/contact{i}",
+        "signal": SIGNALS[i % len(SIGNALS)],
+    }
+
+
+def _stable_hash(value):
+    return zlib.crc32(value.encode("utf-8"))
+
+
+class ProviderLimits:
+    """
+    Latency, error rate and token-bucket rate limit for one provider.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.tokens = rate_limit
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def admit(self):
+        """
+        Take one token; False when the provider is over its rate limit.
+        """
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.rate_limit, self.tokens + (now - self.updated) * self.rate_limit)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def delay(self):
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+
+class MockServices:
+    """
+    MockServices:
+    asyncio HTTP server implementing the endpoints the agents use, backed by a
+    deterministic synthetic data set of `leads` leads split between Clay and
+    Apollo. Sent emails are remembered per campaign so response tracking
+    returns events for exactly the leads that were contacted.
+    """
+
+    def __init__(self, leads=1000, host="127.0.0.1", port=0, limits=None, campaigns=50, seed=0):
+        self.leads = leads
+        self.host = host
+        self.port = port
+        self.campaigns = campaigns
+        self.limits = {name: (limits or {}).get(name) or ProviderLimits() for name in PROVIDERS}
+        self.sent = {}
+        self.sheet_rows = 0
+        self.server = None
+        random.seed(seed)
+        # Clay serves the first half of the data set, Apollo the rest
+        self.ranges = {"clay": (0, leads - leads // 2), "apollo": (leads - leads // 2, leads)}
+        self.routes = {
+            ("POST", "/clay/search"): ("clay", self.search_clay),
+            ("POST", "/apollo/mixed_search"): ("apollo", self.search_apollo),
+            ("GET", "/pdl/enrich"): ("pdl", self.enrich),
+            ("POST", "/v1/chat/completions"): ("openai", self.chat_completion),
+            ("POST", "/apollo/send_email"): ("apollo", self.send_email),
+            ("POST", "/apollo/send_batch"): ("apollo", self.send_batch),
+            ("GET", "/apollo/responses"): ("apollo", self.responses),
+            ("POST", "/sheets/append"): ("sheets", self.append_rows),
+        }
+
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _page(self, provider, offset, per_page):
+        start, end = self.ranges[provider]
+        first = start + offset
+        last = min(end, first + per_page)
+        return [lead_record(i) for i in range(first, last)], last < end
+
+    def search_clay(self, body, query):
+        # Cursor-style pagination
+        offset = int(body.get("cursor") or 0)
+        per_page = int(body.get("per_page") or 100)
+        results, more = self._page("clay", offset, per_page)
+        return {"results": results, "next_cursor": str(offset + per_page) if more else None}
+
+    def search_apollo(self, body, query):
+        # Page-style pagination
+        page = int(body.get("page") or 1)
+        per_page = int(body.get("per_page") or 100)
+        results, _ = self._page("apollo", (page - 1) * per_page, per_page)
+        start, end = self.ranges["apollo"]
+        total_pages = max(1, -(-(end - start) // per_page))
+        return {"results": results, "pagination": {"page": page, "total_pages": total_pages}}
+
+    def enrich(self, body, query):
+        h = _stable_hash((query.get("email") or [""])[0])
+        return {
+            "job_title": ROLES[h % len(ROLES)],
+            "tech": [TECH[h % len(TECH)], TECH[(h >> 8) % len(TECH)]],
+        }
+
+    def chat_completion(self, body, query):
+        prompt = body["messages"][-1]["content"]
+        marker = "JSON array of "
+        if marker in prompt:
+            count = int(prompt.split(marker, 1)[1].split(" ", 1)[0])
+            content = json.dumps([f"Hi there, email {i + 1} of {count}. Open to a quick call?" for i in range(count)])
+        else:
+            content = "Hi there, I wanted to introduce our product. Open to a quick call next week?"
+        completion_tokens = len(content) // 4
+        prompt_tokens = len(prompt) // 4
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def _record_send(self, email):
+        campaign_id = f"campaign_{_stable_hash(email or '') % self.campaigns}"
+        self.sent.setdefault(campaign_id, []).append(email)
+        return campaign_id
+
+    def send_email(self, body, query):
+        return {"campaign_id": self._record_send(body.get("to"))}
+
+    def send_batch(self, body, query):
+        results = []
+        for email in body.get("emails", []):
+            results.append({"to": email.get("to"), "campaign_id": self._record_send(email.get("to")), "status": "sent"})
+        return {"results": results}
+
+    def responses(self, body, query):
+        campaign_id = (query.get("campaign_id") or [""])[0]
+        results = []
+        for email in self.sent.get(campaign_id, []):
+            h = _stable_hash(email)
+            results.append({
+                "email": email,
+                "opened": h % 100 < 40,
+                "clicked": h % 100 < 10,
+                "replied": h % 100 < 5,
+                "meeting_booked": h % 100 < 1,
+                "timestamp": f"2026-01-{1 + h % 28:02d}T12:00:00+00:00",
+            })
+        return {"results": results}
+
+    def append_rows(self, body, query):
+        self.sheet_rows += len(body.get("rows", []))
+        return {"updates": {"updatedRows": len(body.get("rows", []))}}
+
+    async def _respond(self, writer, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        reason = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}[status]
+        extra = "".join(f"{k}: {v}\r\n" for k, v in (headers or {}).items())
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n{extra}"
+            f"Content-Length: {len(data)}\r\n\r\n".encode("ascii") + data
+        )
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, target = lines[0].split(" ")[:2]
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length", 0)))
+                url = urlsplit(target)
+
+                route = self.routes.get((method, url.path))
+                if route is None:
+                    await self._respond(writer, 404, {"error": f"no route {method} {url.path}"})
+                else:
+                    provider, handler = route
+                    limits = self.limits[provider]
+                    limits.requests += 1
+                    delay = limits.delay()
+                    if delay:
+                        await asyncio.sleep(delay)
+                    if not limits.admit():
+                        limits.throttled += 1
+                        await self._respond(writer, 429, {"error": "rate limited"}, {"Retry-After": "1"})
+                    elif limits.error_rate and random.random() < limits.error_rate:
+                        limits.errors += 1
+                        await self._respond(writer, 500, {"error": "injected failure"})
+                    else:
+                        body = json.loads(raw) if raw else {}
+                        await self._respond(writer, 200, handler(body, parse_qs(url.query)))
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    def stats(self):
+        return {
+            name: {"requests": l.requests, "errors": l.errors, "throttled": l.throttled}
+            for name, l in self.limits.items()
+        }
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        await self.server.serve_forever()
+
+
+def build_limits(latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit=0.0, overrides=None):
+    """
+    ProviderLimits for every provider from shared defaults plus per-provider
+    overrides, e.g. {"pdl": {"rate_limit": 100}, "openai": {"latency_ms": 400}}.
+    """
+    defaults = {"latency_ms": latency_ms, "jitter_ms": jitter_ms, "error_rate": error_rate, "rate_limit": rate_limit}
+    return {
+        name: ProviderLimits(**{**defaults, **(overrides or {}).get(name, {})})
+        for name in PROVIDERS
+    }
+
+
+def serve(leads, port, limits, ready=None):
+    """
+    Run the mock services until killed; `ready` (a multiprocessing Event) is
+    set once the socket is listening.
+    """
+    async def main():
+        services = MockServices(leads=leads, port=port, limits=limits)
+        await services.start()
+        if ready is not None:
+            ready.set()
+        await services.server.serve_forever()
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-ins for Clay, Apollo, PDL, OpenAI and Sheets")
+    parser.add_argument("--leads", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second per provider (0 = unlimited)")
+    parser.add_argument("--provider-config", type=json.loads, default={},
+                        help='per-provider overrides as JSON, e.g. \'{"pdl": {"rate_limit": 100}}\'')
+    args = parser.parse_args()
+
+    limits = build_limits(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit, args.provider_config)
+    print(f"Mock services for {args.leads} leads on http://127.0.0.1:{args.port}")
+    try:
+        serve(args.leads, args.port, limits)
+    except KeyboardInterrupt:
+        pass
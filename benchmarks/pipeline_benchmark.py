@@ -0,0 +1,322 @@
+"""
+Offline end-to-end benchmark: drives ProspectSearchAgent through
+FeedbackTrainerAgent against the local stand-ins in benchmarks.mock_services
+(started in their own process) and reports, per stage, leads/second, p50/p99
+call latency, failed calls and peak RSS.
+
+Each run is appended to a JSONL results file; --compare prints the change
+against the previous run with the same size and settings and flags stages
+whose throughput or p99 latency regressed by more than --threshold.
+
+    python -m benchmarks.pipeline_benchmark --sizes 1000,100000,1000000 --latency-ms 20 --compare
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import multiprocessing
+
+import requests
+
+from agents.instrumentation import Metrics, Histogram
+from agents.prospect_search_agent import ProspectSearchAgent
+from agents.data_enrichment_agent import DataEnrichmentAgent
+from agents.scoring_agent import ScoringAgent
+from agents.outreach_content_agent import OutreachContentAgent
+from agents.outreach_executor_agent import OutreachExecutorAgent
+from agents.response_tracker_agent import ResponseTrackerAgent
+from agents.feedback_trainer_agent import FeedbackTrainerAgent
+from benchmarks.mock_services import build_limits, serve
+
+ICP = {
+    "industry": "SaaS",
+    "location": "USA",
+    "employee_count": {"min": 100, "max": 1000},
+    "revenue": {"min": 20000000, "max": 200000000},
+}
+SIGNALS = ["recent_funding", "hiring_for_sales"]
+
+STAGES = ("prospect_search", "enrichment", "scoring", "outreach_content", "send", "response_tracking", "feedback_trainer")
+
+
+class HTTPSheet:
+    """
+    Worksheet stand-in: append_rows posts the rows to the mock Sheets endpoint.
+    """
+
+    def __init__(self, url):
+        self.url = url
+
+    def append_rows(self, rows):
+        response = requests.post(self.url, json={"rows": rows}, timeout=30)
+        response.raise_for_status()
+
+
+def reset_peak_rss():
+    """
+    Reset the kernel's peak RSS counter (Linux); False if unsupported.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def call_stats(metrics):
+    """
+    Combined latency quantiles and failed-call count over every provider a
+    stage called.
+    """
+    merged = Histogram()
+    for (name, _), histogram in metrics.histograms.items():
+        if name.endswith("_request_seconds"):
+            merged.count += histogram.count
+            merged.sum += histogram.sum
+            merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+    failed = 0
+    calls = 0
+    for (name, labels), value in metrics.counters.items():
+        if name.endswith("_requests_total"):
+            calls += value
+            if not dict(labels)["status"].startswith(("ok", "2")):
+                failed += value
+    return {
+        "calls": calls,
+        "failed_calls": failed,
+        "p50_ms": round(merged.quantile(0.5) * 1000, 2),
+        "p99_ms": round(merged.quantile(0.99) * 1000, 2),
+    }
+
+
+def run_pipeline(base_url, args, size):
+    """
+    Run every stage once, in workflow order, returning {stage: stats}.
+    Raises RuntimeError if the search doesn't return all `size` leads, as the
+    later stages would then be measured on a partial data set.
+    """
+    results = {}
+
+    def stage(name, leads_in, fn):
+        metrics = Metrics()
+        reset_peak_rss()
+        start = time.perf_counter()
+        output = fn(metrics)
+        elapsed = time.perf_counter() - start
+        leads = leads_in if leads_in is not None else len(output)
+        results[name] = {
+            "leads": leads,
+            "seconds": round(elapsed, 3),
+            "leads_per_second": round(leads / elapsed, 1) if elapsed > 0 else 0.0,
+            **call_stats(metrics),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        print(f"  {name:<20}{results[name]['leads']:>10} leads {elapsed:>9.2f}s "
+              f"{results[name]['leads_per_second']:>10.1f} leads/s", flush=True)
+        return output
+
+    def search(metrics):
+        agent = ProspectSearchAgent(clay_api_key="bench", apollo_api_key="bench",
+                                    page_size=args.page_size, metrics=metrics)
+        agent.clay_endpoint = f"{base_url}/clay/search"
+        agent.apollo_endpoint = f"{base_url}/apollo/mixed_search"
+        # Streamed search has no overall provider deadline, which a crawl of
+        # a million leads would exceed
+        return list(agent.run(ICP, SIGNALS, stream=True))
+
+    leads = stage("prospect_search", None, search)
+    if len(leads) < size:
+        raise RuntimeError(f"prospect search returned {len(leads)} of {size} leads")
+
+    def enrich(metrics):
+        agent = DataEnrichmentAgent(pdl_api_key="bench", max_workers=args.workers,
+                                    requests_per_second=1e9, metrics=metrics)
+        agent.pdl_endpoint = f"{base_url}/pdl/enrich"
+        return agent.run(leads)
+
+    enriched = stage("enrichment", len(leads), enrich)
+    del leads
+
+    ranked = stage("scoring", len(enriched), lambda metrics: ScoringAgent().run(enriched))
+    del enriched
+
+    def content(metrics):
+        import openai
+        # Point both the 1.x module client and legacy releases at the stand-in
+        openai.base_url = f"{base_url}/v1/"
+        openai.api_base = f"{base_url}/v1"
+        agent = OutreachContentAgent(openai_api_key="bench", max_concurrency=args.workers,
+                                     batch_size=args.llm_batch, metrics=metrics)
+        return agent.run(ranked)
+
+    messages = stage("outreach_content", len(ranked), content)
+    del ranked
+
+    def send(metrics):
+        agent = OutreachExecutorAgent(apollo_api_key="bench", apollo_endpoint=f"{base_url}/apollo/send_email",
+                                      batch_endpoint=f"{base_url}/apollo/send_batch" if args.send_batch > 1 else None,
+                                      max_in_flight=args.workers, batch_size=args.send_batch, metrics=metrics)
+        return agent.run(messages)
+
+    sent = stage("send", len(messages), send)
+    del messages
+
+    def track(metrics):
+        agent = ResponseTrackerAgent(apollo_api_key="bench", max_workers=args.workers,
+                                     requests_per_second=1e9, metrics=metrics)
+        agent.tracking_endpoint = f"{base_url}/apollo/responses"
+        campaign_ids = [status["campaign_id"] for status in sent if status.get("campaign_id")]
+        return agent.run(campaign_ids)
+
+    responses = stage("response_tracking", len(sent), track)
+    del sent
+
+    def feedback(metrics):
+        agent = FeedbackTrainerAgent(sheet_id="bench", sheet=HTTPSheet(f"{base_url}/sheets/append"), metrics=metrics)
+        agent.run(responses)
+        return responses
+
+    stage("feedback_trainer", None, feedback)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(record, history, threshold):
+    """
+    Print per-stage changes against the latest comparable run; returns the
+    number of regressions beyond `threshold` (a fraction).
+    """
+    previous = [r for r in history if r["size"] == record["size"] and r["settings"] == record["settings"]]
+    if not previous:
+        print(f"  no earlier run with the same size and settings to compare against")
+        return 0
+    baseline = previous[-1]
+    print(f"  vs {baseline['revision'] or 'unknown'} ({baseline['timestamp']}):")
+    regressions = 0
+    for name, stats in record["stages"].items():
+        old = baseline["stages"].get(name)
+        if not old:
+            continue
+        notes = []
+        if old["leads_per_second"]:
+            change = stats["leads_per_second"] / old["leads_per_second"] - 1
+            notes.append(f"leads/s {change:+.1%}")
+            if change < -threshold:
+                notes.append("REGRESSION")
+                regressions += 1
+        if old["p99_ms"]:
+            change = stats["p99_ms"] / old["p99_ms"] - 1
+            notes.append(f"p99 {change:+.1%}")
+            if change > threshold:
+                notes.append("REGRESSION")
+                regressions += 1
+        print(f"    {name:<20}{', '.join(notes)}")
+    return regressions
+
+
+def print_table(results):
+    print(f"  {'stage':<20}{'leads':>10}{'leads/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'calls':>9}{'failed':>8}{'peak MB':>9}")
+    for name, stats in results.items():
+        print(f"  {name:<20}{stats['leads']:>10}{stats['leads_per_second']:>11.1f}{stats['p50_ms']:>9.1f}"
+              f"{stats['p99_ms']:>9.1f}{stats['calls']:>9}{stats['failed_calls']:>8}{stats['peak_rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--sizes", default="1000", help="comma-separated lead counts, e.g. 1000,100000,1000000")
+    parser.add_argument("--workers", type=int, default=8, help="concurrency for enrichment, content, send and tracking")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--llm-batch", type=int, default=10, help="leads per completion request")
+    parser.add_argument("--send-batch", type=int, default=50, help="emails per send request (1 = single sends)")
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second per provider (0 = unlimited)")
+    parser.add_argument("--provider-config", type=json.loads, default={},
+                        help='per-provider overrides as JSON, e.g. \'{"openai": {"latency_ms": 400}}\'')
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--results", default=".cache/benchmarks/pipeline.jsonl")
+    parser.add_argument("--compare", action="store_true", help="compare with the previous matching run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (fraction)")
+    args = parser.parse_args()
+
+    settings = {
+        key: getattr(args, key)
+        for key in ("workers", "page_size", "llm_batch", "send_batch", "latency_ms",
+                    "jitter_ms", "error_rate", "rate_limit", "provider_config")
+    }
+    limits = build_limits(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit, args.provider_config)
+    history = load_results(args.results)
+    regressions = 0
+    failures = 0
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    for size in sizes:
+        ready = multiprocessing.Event()
+        server = multiprocessing.Process(target=serve, args=(size, args.port, limits, ready), daemon=True)
+        server.start()
+        ready.wait(10)
+        print(f"\n=== {size} leads ===")
+        try:
+            results = run_pipeline(f"http://127.0.0.1:{args.port}", args, size)
+        except RuntimeError as e:
+            # Not recorded, so it can't become the baseline for --compare
+            print(f"  run failed: {e}")
+            failures += 1
+            continue
+        finally:
+            server.terminate()
+            server.join()
+
+        print_table(results)
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "size": size,
+            "settings": settings,
+            "stages": results,
+        }
+        if args.compare:
+            regressions += compare(record, history, args.threshold)
+        history.append(record)
+        os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+        with open(args.results, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    if failures < len(sizes):
+        print(f"\nResults appended to {args.results}")
+    if regressions or failures:
+        sys.exit(1)
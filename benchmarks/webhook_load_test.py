@@ -0,0 +1,92 @@
+"""
+Load test for agents.webhook_receiver.WebhookReceiver.
+
+Starts the receiver in its own process (a single core) backed by a temporary
+EventStore, then drives it from asyncio clients over keep-alive connections
+and reports sustained events per second.
+
+    python -m benchmarks.webhook_load_test --events 50000 --connections 16 --per-request 1
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+
+EVENT_TYPES = ("open", "click", "reply", "meeting")
+
+
+def serve(port, store_path, ready):
+    from agents.event_store import EventStore
+    from agents.webhook_receiver import WebhookReceiver
+
+    async def main():
+        receiver = WebhookReceiver(EventStore(path=store_path), port=port)
+        await receiver.start()
+        ready.set()
+        await receiver.server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def client(port, events, per_request, counter):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for start in range(0, len(events), per_request):
+            chunk = events[start:start + per_request]
+            body = json.dumps(chunk if per_request > 1 else chunk[0]).encode("utf-8")
+            writer.write(
+                f"POST /webhooks HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+            )
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            await reader.readexactly(length)
+            counter[0] += len(chunk)
+    finally:
+        writer.close()
+
+
+async def drive(port, total, connections, per_request):
+    events = [
+        {
+            "event": EVENT_TYPES[i % len(EVENT_TYPES)],
+            "campaign_id": f"campaign_{i % 50}",
+            "email": f"lead{i}@example.com",
+            "timestamp": f"2026-01-01T00:00:{i % 60:02d}",
+        }
+        for i in range(total)
+    ]
+    share = -(-total // connections)
+    counter = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(port, events[i:i + share], per_request, counter)
+        for i in range(0, total, share)
+    ))
+    return counter[0], time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Webhook receiver load test")
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--per-request", type=int, default=1, help="events per POST body")
+    parser.add_argument("--port", type=int, default=18085)
+    args = parser.parse_args()
+
+    store_path = os.path.join(tempfile.mkdtemp(), "events.sqlite")
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args.port, store_path, ready), daemon=True)
+    server.start()
+    ready.wait(10)
+
+    try:
+        sent, elapsed = asyncio.run(drive(args.port, args.events, args.connections, args.per_request))
+    finally:
+        server.terminate()
+
+    print(f"{sent} events over {args.connections} connections in {elapsed:.2f}s "
+          f"-> {sent / elapsed:,.0f} events/s ({args.per_request} per request)")
@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import uuid
+import zlib
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import langgraph_builder as builder
+from checkpoint_store import CheckpointStore
+from workflow_plan import load_plan
+from agents.http_client import BUDGET_PROVIDERS, get_http_client
+from agents.identity_index import normalize_email, normalize_linkedin
+from agents.instrumentation import Metrics
+from agents.lead import to_jsonable
+from agents.rate_limiter import SharedTokenBucket
+
+# Agent-level quotas shared by the worker processes:
+# name -> (environment variable, default requests/second or None if unlimited)
+AGENT_QUOTAS = {
+    "pdl": ("PDL_REQUESTS_PER_SECOND", "2"),
+    "response_tracking": ("TRACKING_REQUESTS_PER_SECOND", "2"),
+    "openai": ("OPENAI_REQUESTS_PER_SECOND", None),
+}
+
+# Agents that handle each lead on its own, so their steps can run per shard
+SHARDABLE_AGENTS = {"DataEnrichmentAgent", "ScoringAgent", "OutreachContentAgent", "OutreachExecutorAgent"}
+
+
+class CampaignJob:
+    """
+    CampaignJob:
+    One workflow run for a worker process. `stage` is "run" for a whole
+    campaign, or "head", "shard" and "tail" for the parts of a sharded one.
+    `steps` limits it to those steps (and their dependencies); `seed` holds
+    outputs of steps already run elsewhere, e.g. this shard's slice of the
+    leads, which are recorded as completed before the run starts.
+    """
+
+    def __init__(self, campaign, run_id, workflow, stage="run", steps=None, seed=None, shard=None):
+        self.campaign = campaign
+        self.run_id = run_id
+        self.workflow = workflow
+        self.stage = stage
+        self.steps = steps
+        self.seed = seed or {}
+        self.shard = shard
+
+
+def shared_rate_limits(context=None):
+    """
+    SharedTokenBucket per quota configured in the environment: the HTTP
+    client's provider budgets (<PROVIDER>_REQUESTS_PER_SECOND) and the
+    agent-level limiters in AGENT_QUOTAS. Every worker draws from the same
+    buckets, so N workers together stay within one API quota.
+    """
+    http_budgets = {}
+    for provider in BUDGET_PROVIDERS:
+        rate = os.getenv(f"{provider.upper()}_REQUESTS_PER_SECOND")
+        if rate:
+            http_budgets[provider] = SharedTokenBucket(float(rate), context=context)
+    limiters = {}
+    for name, (variable, default) in AGENT_QUOTAS.items():
+        rate = os.getenv(variable, default)
+        if rate:
+            # Burst of one, as the agents' own limiters
+            limiters[name] = SharedTokenBucket(float(rate), capacity=1, context=context)
+    return http_budgets, limiters
+
+
+def _init_worker(http_budgets, limiters):
+    builder.load_env()
+    client = get_http_client()
+    for provider, bucket in http_budgets.items():
+        client.use_budget(provider, bucket)
+    builder.rate_limiters.update(limiters)
+
+
+def run_job(job, root, step_workers=1):
+    """
+    Run one job in this process with its own outputs, plan, checkpoints and
+    metrics (the builder's module state is reset first). Returns the job,
+    {step_id: output} and the run's Metrics.
+    """
+    builder.WORKFLOW_PATH = job.workflow
+    builder.plan = None
+    builder.outputs = {}
+    builder.checkpoints = CheckpointStore(run_id=job.run_id, root=root)
+    builder.metrics.reset()
+    for step_id, result in job.seed.items():
+        builder.checkpoints.save_step(step_id, result)
+
+    builder.main(max_workers=step_workers, steps=job.steps)
+    outputs = {step_id: output["output"] for step_id, output in builder.outputs.items()}
+    return job, outputs, builder.metrics
+
+
+def shard_of(lead, shards):
+    """
+    Stable shard index for a lead from its normalized email (or LinkedIn URL),
+    so the same person always lands in the same shard.
+    """
+    key = (normalize_email(lead.get("email")) or normalize_linkedin(lead.get("linkedin"))
+           or json.dumps(lead, default=to_jsonable, sort_keys=True))
+    return zlib.crc32(key.encode("utf-8")) % shards
+
+
+def partition(leads, shards):
+    parts = [[] for _ in range(shards)]
+    for lead in leads:
+        parts[shard_of(lead, shards)].append(lead)
+    return parts
+
+
+def merge_outputs(results):
+    """
+    Merge {step_id: output} of a campaign's shards (in shard order): list
+    outputs are concatenated, anything else is kept as a list of per-shard values.
+    """
+    merged = {}
+    for outputs in results:
+        for step_id, output in outputs.items():
+            merged.setdefault(step_id, []).append(output)
+    return {
+        step_id: ([item for output in values for item in output]
+                  if all(isinstance(output, list) for output in values) else values)
+        for step_id, values in merged.items()
+    }
+
+
+def split_steps(plan, shard_after):
+    """
+    Split a plan for sharding into (head, sharded) step ids: the steps up to
+    `shard_after`, run once, and the per-lead steps after it that depend only
+    on those, run once per shard. The remaining steps (response tracking,
+    feedback) run once on the merged shard output.
+    """
+    head = plan.with_dependencies([shard_after])
+    sharded = set()
+    for step_id in plan.order:
+        if (step_id not in head and plan.by_id[step_id]["agent"] in SHARDABLE_AGENTS
+                and plan.graph[step_id] <= head | sharded):
+            sharded.add(step_id)
+    return head, sharded
+
+
+def campaign_names(workflows):
+    """
+    Campaign name per workflow file (its base name, numbered if repeated).
+    """
+    names = []
+    for path in workflows:
+        base = os.path.splitext(os.path.basename(path))[0]
+        name, n = base, 1
+        while name in names:
+            n += 1
+            name = f"{base}-{n}"
+        names.append(name)
+    return names
+
+
+def run_campaigns(workflows, processes=None, shards=1, shard_after=None, step_workers=1,
+                  batch_id=None, root=".runs"):
+    """
+    Run many workflows across a pool of `processes` worker processes, each
+    run with isolated state and checkpoints under <root>/<batch_id>/<campaign>.
+    With shards > 1 every workflow first runs up to `shard_after` (default:
+    its first step, normally the prospect search) once; the leads it returns
+    are split by lead hash and the per-lead steps after it (enrichment through
+    sending, see split_steps) run once per shard. The remaining steps then run
+    once on the merged shard outputs. ScoringAgent's top_k applies per shard.
+
+    Provider quotas are shared by all workers (see shared_rate_limits), as are
+    the SQLite caches and identity index, which every worker opens by path.
+    Returns {campaign: {step_id: merged output}} and the merged Metrics; the
+    merged outputs and metrics are also written to the batch directory.
+    """
+    builder.load_env()
+    batch_id = batch_id or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    batch_dir = os.path.join(root, batch_id)
+    context = multiprocessing.get_context()
+    http_budgets, limiters = shared_rate_limits(context)
+
+    pending = []
+    splits = {}
+    for campaign, workflow in zip(campaign_names(workflows), workflows):
+        if shards <= 1:
+            pending.append(CampaignJob(campaign, campaign, workflow))
+            continue
+        plan = load_plan(workflow, known_agents=builder.AGENTS)
+        step_id = shard_after or plan.order[0]
+        if step_id not in plan.graph:
+            raise ValueError(f"Unknown shard step {step_id} in {workflow}")
+        head, sharded = split_steps(plan, step_id)
+        splits[campaign] = (step_id, sharded, len(head) + len(sharded) < len(plan.graph))
+        pending.append(CampaignJob(campaign, f"{campaign}/head", workflow, stage="head", steps=[step_id]))
+
+    shard_results = {}
+    head_outputs = {}
+    merged = {}
+    failed = []
+    metrics = Metrics()
+    campaign_metrics = {}
+    print(f"Batch ID: {batch_id} ({len(workflows)} workflows, {processes or os.cpu_count()} processes)")
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker,
+                             initargs=(http_budgets, limiters)) as pool:
+        running = {pool.submit(run_job, job, batch_dir, step_workers): job for job in pending}
+
+        def finish_shards(job, seed):
+            # Run the steps after the sharded ones once, on the merged outputs
+            if splits[job.campaign][2]:
+                tail = CampaignJob(job.campaign, f"{job.campaign}/tail", job.workflow, stage="tail", seed=seed)
+                running[pool.submit(run_job, tail, batch_dir, step_workers)] = tail
+            else:
+                merged[job.campaign] = seed
+
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                job = running.pop(future)
+                try:
+                    _, outputs, job_metrics = future.result()
+                except Exception as e:
+                    print(f"[Campaign Error]: {e} in {job.run_id}")
+                    failed.append(job.run_id)
+                    continue
+                metrics.merge(job_metrics)
+                campaign_metrics.setdefault(job.campaign, Metrics()).merge(job_metrics)
+
+                if job.stage == "head":
+                    # Fan the per-lead steps out over the shards
+                    step_id, sharded, _ = splits[job.campaign]
+                    leads = outputs[step_id]
+                    if not isinstance(leads, list):
+                        print(f"[Campaign Error]: step {step_id} of {job.campaign} did not return a list of leads")
+                        failed.append(job.run_id)
+                        continue
+                    head_outputs[job.campaign] = outputs
+                    if not sharded:
+                        finish_shards(job, outputs)
+                        continue
+                    shard_results[job.campaign] = [None] * shards
+                    for shard, part in enumerate(partition(leads, shards)):
+                        shard_job = CampaignJob(job.campaign, f"{job.campaign}/shard-{shard:03d}-of-{shards:03d}",
+                                                job.workflow, stage="shard", steps=sorted(sharded),
+                                                seed={**outputs, step_id: part}, shard=shard)
+                        running[pool.submit(run_job, shard_job, batch_dir, step_workers)] = shard_job
+                elif job.stage == "shard":
+                    parts = shard_results[job.campaign]
+                    parts[job.shard] = outputs
+                    if all(part is not None for part in parts):
+                        sharded = splits[job.campaign][1]
+                        combined = merge_outputs([{k: v for k, v in part.items() if k in sharded} for part in parts])
+                        # Steps run before sharding are taken whole from the head run
+                        finish_shards(job, {**combined, **head_outputs[job.campaign]})
+                else:
+                    merged[job.campaign] = outputs
+
+    for campaign in merged:
+        with open(os.path.join(batch_dir, f"{campaign}.json"), "w") as f:
+            json.dump(merged[campaign], f, default=to_jsonable)
+        campaign_metrics[campaign].export(os.path.join(batch_dir, f"{campaign}.metrics.json"))
+
+    print("\n=== Batch Metrics ===")
+    print(metrics.summary())
+    for target in ("metrics.json", "metrics.prom"):
+        metrics.export(os.path.join(batch_dir, target))
+    print(f"\nResults and metrics written to {batch_dir}")
+    if failed:
+        print(f"Failed runs: {', '.join(sorted(failed))} (retry with --resume {batch_id})")
+    return merged, metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many workflow configs (or shards of one) across processes")
+    parser.add_argument("workflows", nargs="+", help="workflow definitions, one campaign each")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="split each workflow's leads into this many runs by lead hash")
+    parser.add_argument("--shard-after", metavar="STEP",
+                        help="step whose leads are sharded (default: the first step)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="independent steps to run in parallel within each run")
+    parser.add_argument("--resume", metavar="BATCH_ID",
+                        help="resume a previous batch, skipping completed steps and leads")
+    args = parser.parse_args()
+
+    if args.resume and not os.path.isdir(os.path.join(".runs", args.resume)):
+        parser.error(f"No checkpoints found for batch {args.resume} in .runs")
+
+    merged, _ = run_campaigns(args.workflows, processes=args.processes, shards=args.shards,
+                              shard_after=args.shard_after, step_workers=args.workers, batch_id=args.resume)
+    if len(merged) < len(args.workflows):
+        sys.exit(1)
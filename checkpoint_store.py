@@ -0,0 +1,93 @@
+import os
+import json
+import uuid
+from datetime import datetime
+
+from agents.lead import to_jsonable
+
+class CheckpointStore:
+    """
+    CheckpointStore:
+    Persists workflow step outputs under <root>/<run_id>/ so a failed run can be
+    resumed. Completed steps are written atomically as <step_id>.json; steps in
+    progress append each processed chunk to <step_id>.partial.jsonl.
+    """
+
+    def __init__(self, run_id=None, root=".runs"):
+        self.run_id = run_id or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(root, self.run_id)
+        os.makedirs(self.path, exist_ok=True)
+
+    @classmethod
+    def open_existing(cls, run_id, root=".runs"):
+        """
+        Open the store of a previous run, failing if it does not exist.
+        """
+        if not os.path.isdir(os.path.join(root, run_id)):
+            raise FileNotFoundError(f"No checkpoints found for run {run_id} in {root}")
+        return cls(run_id=run_id, root=root)
+
+    def _step_file(self, step_id):
+        return os.path.join(self.path, f"{step_id}.json")
+
+    def _partial_file(self, step_id):
+        return os.path.join(self.path, f"{step_id}.partial.jsonl")
+
+    def load_outputs(self):
+        """
+        Return {step_id: {"output": result}} for every completed step.
+        """
+        outputs = {}
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                with open(os.path.join(self.path, name)) as f:
+                    outputs[name[:-len(".json")]] = {"output": json.load(f)}
+        return outputs
+
+    def save_step(self, step_id, result):
+        """
+        Atomically record a completed step and drop its partial progress.
+        """
+        tmp = self._step_file(step_id) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(result, f, default=to_jsonable)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._step_file(step_id))
+        if os.path.exists(self._partial_file(step_id)):
+            os.remove(self._partial_file(step_id))
+
+    def load_partial(self, step_id):
+        """
+        Return the per-lead results already recorded for an unfinished step.
+        A truncated trailing line from a crash mid-write is ignored.
+        """
+        results = []
+        path = self._partial_file(step_id)
+        if not os.path.exists(path):
+            return results
+        good_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    results.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                good_bytes += len(line)
+        # Drop the torn tail so later appends start on a clean line
+        if good_bytes != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good_bytes)
+        return results
+
+    def append_partial(self, step_id, results):
+        """
+        Append per-lead results for an unfinished step.
+        """
+        with open(self._partial_file(step_id), "a") as f:
+            for item in results:
+                f.write(json.dumps(item, default=to_jsonable) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
@@ -1,112 +1,566 @@
 import os
-import json
-from dotenv import load_dotenv
+import heapq
+import queue
+import argparse
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-# Load agents
-from agents.prospect_search_agent import ProspectSearchAgent
-from agents.data_enrichment_agent import DataEnrichmentAgent
-from agents.scoring_agent import ScoringAgent
-from agents.outreach_content_agent import OutreachContentAgent
-from agents.outreach_executor_agent import OutreachExecutorAgent
-from agents.response_tracker_agent import ResponseTrackerAgent
-from agents.feedback_trainer_agent import FeedbackTrainerAgent
+from checkpoint_store import CheckpointStore
+from workflow_plan import load_plan
+from agents.instrumentation import get_metrics
+from agents.rate_limiter import TokenBucket
 
-load_dotenv()
-
-# Load workflow.json
-with open("workflow.json") as f:
-    workflow = json.load(f)
+# Workflow file and its compiled plan, loaded on first use
+WORKFLOW_PATH = "workflow.json"
+plan = None
 
 # Dictionary to store outputs of each step
 outputs = {}
 
-# Mapping agent names to classes
-AGENT_CLASSES = {
-    "ProspectSearchAgent": ProspectSearchAgent,
-    "DataEnrichmentAgent": DataEnrichmentAgent,
-    "ScoringAgent": ScoringAgent,
-    "OutreachContentAgent": OutreachContentAgent,
-    "OutreachExecutorAgent": OutreachExecutorAgent,
-    "ResponseTrackerAgent": ResponseTrackerAgent,
-    "FeedbackTrainerAgent": FeedbackTrainerAgent
+# Checkpoint store for the current run (None disables checkpointing)
+checkpoints = None
+
+# Agents whose output is one record per input lead, in order, mapped to that
+# input key. Within these steps progress is checkpointed every CHECKPOINT_EVERY
+# (environment, default 50) leads so a resumed run skips leads that were
+# already processed.
+RESUMABLE_INPUTS = {
+    "DataEnrichmentAgent": "leads",
+    "OutreachContentAgent": "ranked_leads",
+    "OutreachExecutorAgent": "messages",
 }
 
-def replace_placeholders(obj, outputs):
-    """
-    Recursively replace {{step.output.key}} with actual data from previous step outputs
-    """
-    if isinstance(obj, dict):
-        return {k: replace_placeholders(v, outputs) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [replace_placeholders(item, outputs) for item in obj]
-    elif isinstance(obj, str) and obj.startswith("{{") and obj.endswith("}}"):
-        ref = obj[2:-2].strip()
-        # Example: prospect_search.output.leads
-        parts = ref.split(".")
-        data = outputs
-        for part in parts:
-            data = data.get(part, {})
-        return data
-    else:
-        return obj
-
-def main():
-    for step in workflow["steps"]:
-        agent_name = step["agent"]
-        AgentClass = AGENT_CLASSES.get(agent_name)
-
-        print(f"\n=== Running Step: {step['id']} ({agent_name}) ===")
-
-        inputs = replace_placeholders(step.get("inputs", {}), outputs)
-
-        # Instantiate agent with relevant API keys
-        if agent_name == "ProspectSearchAgent":
-            agent = AgentClass(
-                clay_api_key=os.getenv("CLAY_API_KEY"),
-                apollo_api_key=os.getenv("APOLLO_API_KEY")
-            )
-            result = agent.run(**inputs)
-
-        elif agent_name == "DataEnrichmentAgent":
-            agent = AgentClass(pdl_api_key=os.getenv("PDL_API_KEY"))
-            result = agent.run(inputs.get("leads", []))
-
-        elif agent_name == "ScoringAgent":
-            agent = AgentClass(scoring_criteria=workflow.get("config", {}).get("scoring", {}))
-            result = agent.run(inputs.get("enriched_leads", []))
-
-        elif agent_name == "OutreachContentAgent":
-            agent = AgentClass(openai_api_key=os.getenv("OPENAI_KEY"))
-            result = agent.run(
-                ranked_leads=inputs.get("ranked_leads", []),
-                persona=inputs.get("persona", "SDR"),
-                tone=inputs.get("tone", "friendly")
-            )
-
-        elif agent_name == "OutreachExecutorAgent":
-            agent = AgentClass(apollo_api_key=os.getenv("APOLLO_API_KEY"))
-            result = agent.run(inputs.get("messages", []))
-
-        elif agent_name == "ResponseTrackerAgent":
-            agent = AgentClass(apollo_api_key=os.getenv("APOLLO_API_KEY"))
-            # Extract campaign IDs from previous step
-            campaign_ids = [item.get("campaign_id") for item in inputs.get("campaign_id", []) if item.get("campaign_id")]
-            result = agent.run(campaign_ids)
-
-        elif agent_name == "FeedbackTrainerAgent":
-            agent = AgentClass(sheet_id=os.getenv("SHEET_ID"))
-            result = agent.run(inputs.get("responses", []))
+# Input key holding each agent's leads (or messages/responses), for step metrics
+LEAD_INPUTS = {
+    **RESUMABLE_INPUTS,
+    "ScoringAgent": "enriched_leads",
+    "FeedbackTrainerAgent": "responses",
+}
 
-        else:
-            print(f"Unknown agent: {agent_name}")
+# Step timings, call counts/latencies and cache hit rates for this process
+metrics = get_metrics()
+
+# Rate limiters by quota ("pdl", "response_tracking", "openai") that agents
+# use instead of their own, e.g. buckets shared by campaign_runner workers
+rate_limiters = {}
+
+_env_loaded = False
+
+def load_env():
+    """
+    Load .env once, on first use rather than at import.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+def get_plan():
+    """
+    Compiled plan of WORKFLOW_PATH, validated on first use.
+    """
+    global plan
+    if plan is None:
+        plan = load_plan(WORKFLOW_PATH, known_agents=AGENTS)
+    return plan
+
+_identity_index = None
+
+def get_identity_index():
+    """
+    Identity index shared by the search and send steps of this process.
+    """
+    global _identity_index
+    if _identity_index is None:
+        from agents.identity_index import IdentityIndex
+        _identity_index = IdentityIndex(path=os.getenv("IDENTITY_INDEX_PATH", ".cache/identity_index.sqlite"))
+    return _identity_index
+
+# Factories: build an agent from its class with keys and settings from the environment
+
+def _create_prospect_search(cls):
+    return cls(
+        clay_api_key=os.getenv("CLAY_API_KEY"),
+        apollo_api_key=os.getenv("APOLLO_API_KEY"),
+        identity_index=get_identity_index(),
+        skip_seen=os.getenv("SKIP_SEEN_LEADS", "").lower() in ("1", "true", "yes")
+    )
+
+def _create_data_enrichment(cls):
+    from agents.enrichment_cache import EnrichmentCache
+    return cls(
+        pdl_api_key=os.getenv("PDL_API_KEY"),
+        max_workers=int(os.getenv("PDL_MAX_WORKERS", "1")),
+        requests_per_second=float(os.getenv("PDL_REQUESTS_PER_SECOND", "2")),
+        rate_limiter=rate_limiters.get("pdl"),
+        cache=EnrichmentCache(
+            path=os.getenv("ENRICHMENT_CACHE_PATH", ".cache/enrichment_cache.sqlite"),
+            ttl_seconds=int(os.getenv("ENRICHMENT_CACHE_TTL", str(7 * 24 * 3600)))
+        )
+    )
+
+def _create_scoring(cls):
+    return cls(scoring_criteria=get_plan().config.get("scoring", {}))
+
+def _openai_rate_limiter():
+    rate = os.getenv("OPENAI_REQUESTS_PER_SECOND")
+    return TokenBucket(float(rate), capacity=1) if rate else None
+
+def _create_outreach_content(cls):
+    from agents.prompt_cache import PromptCache
+    return cls(
+        openai_api_key=os.getenv("OPENAI_KEY"),
+        max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "1")),
+        batch_size=int(os.getenv("OPENAI_BATCH_SIZE", "1")),
+        rate_limiter=rate_limiters.get("openai") or _openai_rate_limiter(),
+        cache=PromptCache(
+            path=os.getenv("PROMPT_CACHE_PATH", ".cache/prompt_cache.sqlite"),
+            ttl_seconds=int(os.getenv("PROMPT_CACHE_TTL", str(30 * 24 * 3600)))
+        ),
+        bypass_cache=os.getenv("PROMPT_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+    )
+
+def _create_outreach_executor(cls):
+    from agents.send_ledger import SendLedger
+    return cls(
+        apollo_api_key=os.getenv("APOLLO_API_KEY"),
+        max_in_flight=int(os.getenv("SEND_MAX_IN_FLIGHT", "1")),
+        batch_size=int(os.getenv("SEND_BATCH_SIZE", "1")),
+        ledger=SendLedger(path=os.getenv("SEND_LEDGER_PATH", ".cache/send_ledger.jsonl")),
+        identity_index=get_identity_index()
+    )
+
+def _create_response_tracker(cls):
+    from agents.event_store import EventStore
+    return cls(
+        apollo_api_key=os.getenv("APOLLO_API_KEY"),
+        requests_per_second=float(os.getenv("TRACKING_REQUESTS_PER_SECOND", "2")),
+        rate_limiter=rate_limiters.get("response_tracking"),
+        event_store=EventStore(path=os.getenv("EVENT_STORE_PATH", ".cache/events.sqlite"))
+    )
+
+def _create_feedback_trainer(cls):
+    return cls(sheet_id=os.getenv("SHEET_ID"))
+
+# Runners: call the agent's run method with the inputs resolved for its step
+
+def _run_prospect_search(agent, inputs):
+    return agent.run(**inputs)
+
+def _run_data_enrichment(agent, inputs):
+    return agent.run(inputs.get("leads", []))
+
+def _run_scoring(agent, inputs):
+    return agent.run(
+        inputs.get("enriched_leads", []),
+        top_k=inputs.get("top_k"),
+        min_score=inputs.get("min_score")
+    )
+
+def _run_outreach_content(agent, inputs):
+    return agent.run(
+        ranked_leads=inputs.get("ranked_leads", []),
+        persona=inputs.get("persona", "SDR"),
+        tone=inputs.get("tone", "friendly")
+    )
+
+def _run_outreach_executor(agent, inputs):
+    return agent.run(inputs.get("messages", []))
+
+def _run_response_tracker(agent, inputs):
+    # Extract campaign IDs from previous step
+    campaign_ids = [item.get("campaign_id") for item in inputs.get("campaign_id", []) if item.get("campaign_id")]
+    return agent.run(campaign_ids)
+
+def _run_feedback_trainer(agent, inputs):
+    return agent.run(inputs.get("responses", []), lead_attributes=_lead_attributes())
+
+class AgentSpec:
+    """
+    AgentSpec:
+    Registry entry for an agent: the module and class to import (on first
+    use only, so a run never loads agents or client libraries it doesn't
+    need), a factory building an instance and a runner calling it.
+    """
+
+    def __init__(self, module, class_name, create, run):
+        self.module = module
+        self.class_name = class_name
+        self.create = create
+        self.run = run
+        self._cls = None
+
+    @property
+    def cls(self):
+        if self._cls is None:
+            self._cls = getattr(importlib.import_module(self.module), self.class_name)
+        return self._cls
+
+AGENTS = {
+    "ProspectSearchAgent": AgentSpec(
+        "agents.prospect_search_agent", "ProspectSearchAgent", _create_prospect_search, _run_prospect_search),
+    "DataEnrichmentAgent": AgentSpec(
+        "agents.data_enrichment_agent", "DataEnrichmentAgent", _create_data_enrichment, _run_data_enrichment),
+    "ScoringAgent": AgentSpec(
+        "agents.scoring_agent", "ScoringAgent", _create_scoring, _run_scoring),
+    "OutreachContentAgent": AgentSpec(
+        "agents.outreach_content_agent", "OutreachContentAgent", _create_outreach_content, _run_outreach_content),
+    "OutreachExecutorAgent": AgentSpec(
+        "agents.outreach_executor_agent", "OutreachExecutorAgent", _create_outreach_executor, _run_outreach_executor),
+    "ResponseTrackerAgent": AgentSpec(
+        "agents.response_tracker_agent", "ResponseTrackerAgent", _create_response_tracker, _run_response_tracker),
+    "FeedbackTrainerAgent": AgentSpec(
+        "agents.feedback_trainer_agent", "FeedbackTrainerAgent", _create_feedback_trainer, _run_feedback_trainer),
+}
+
+def create_agent(agent_name):
+    """
+    Instantiate an agent with relevant API keys. Returns None for unknown agents.
+    """
+    spec = AGENTS.get(agent_name)
+    if spec is None:
+        return None
+    load_env()
+    return spec.create(spec.cls)
+
+def run_agent(agent_name, agent, inputs):
+    """
+    Call the agent's run method with the inputs resolved for its step.
+    """
+    return AGENTS[agent_name].run(agent, inputs)
+
+def _lead_attributes():
+    """
+    Map lead email -> persona/tone/role/technologies from the scoring and
+    outreach content steps, so feedback can be segmented by them.
+    """
+    attributes = {}
+    content_inputs = {}
+    steps = get_plan().steps
+    for step in steps:
+        if step["agent"] == "OutreachContentAgent":
+            content_inputs = step.get("inputs", {})
+    for step in steps:
+        if step["agent"] != "ScoringAgent":
             continue
+        ranked = outputs.get(step["id"], {}).get("output")
+        for lead in ranked if isinstance(ranked, list) else []:
+            if lead.get("email"):
+                attributes[lead["email"]] = {
+                    "persona": content_inputs.get("persona", "SDR"),
+                    "tone": content_inputs.get("tone", "friendly"),
+                    "role": lead.get("role"),
+                    "technologies": lead.get("technologies", []),
+                }
+    return attributes
 
-        outputs[step["id"]] = {"output": result}
-        print(f"Step {step['id']} completed. Output: {str(result)[:200]}...")  # Print first 200 chars
+def run_step(step):
+    """
+    Run a single workflow step to completion and store its output.
+    """
+    agent_name = step["agent"]
+
+    print(f"\n=== Running Step: {step['id']} ({agent_name}) ===")
+
+    inputs = get_plan().resolve_inputs(step["id"], outputs)
+
+    agent = create_agent(agent_name)
+    if agent is None:
+        print(f"Unknown agent: {agent_name}")
+        return
+    with metrics.step(step["id"], agent_name) as step_metrics:
+        step_metrics.leads_in = _count(inputs.get(LEAD_INPUTS.get(agent_name)))
+        if checkpoints is None:
+            result = run_agent(agent_name, agent, inputs)
+        else:
+            result = _run_checkpointed(step, agent_name, agent, inputs)
+            checkpoints.save_step(step["id"], result)
+        step_metrics.leads_out = _count(result)
+
+    outputs[step["id"]] = {"output": result}
+    print(f"Step {step['id']} completed. Output: {str(result)[:200]}...")  # Print first 200 chars
+
+def _count(items):
+    return len(items) if isinstance(items, (list, tuple)) else 0
+
+def _run_checkpointed(step, agent_name, agent, inputs):
+    """
+    Run a step in chunks, recording per-lead results as they complete and
+    skipping leads already recorded by an earlier attempt of the same run.
+    """
+    key = RESUMABLE_INPUTS.get(agent_name)
+    if key is None:
+        result = run_agent(agent_name, agent, inputs)
+        # Materialize streamed output so it can be persisted
+        return result if isinstance(result, (list, dict)) else list(result)
+
+    items = list(inputs.get(key) or [])
+    results = checkpoints.load_partial(step["id"])
+    if results:
+        print(f"Resuming step {step['id']}: {len(results)} of {len(items)} leads already processed")
+    chunk_size = int(os.getenv("CHECKPOINT_EVERY", "50"))
+    for start in range(len(results), len(items), chunk_size):
+        chunk_result = run_agent(agent_name, agent, {**inputs, key: items[start:start + chunk_size]})
+        checkpoints.append_partial(step["id"], chunk_result)
+        results.extend(chunk_result)
+    return results
+
+def main(max_workers=1, steps=None):
+    """
+    Run the workflow as a DAG: each step starts as soon as the steps it
+    references have finished, with up to `max_workers` steps in parallel.
+    With one worker steps run one at a time in workflow order.
+    When a checkpoint store is active, steps it already holds are skipped.
+    `steps` limits the run to those step ids and the steps they depend on.
+    """
+    plan = get_plan()
+    selected = plan.with_dependencies(steps) if steps else set(plan.graph)
+    done = set()
+
+    if checkpoints is not None:
+        completed = checkpoints.load_outputs()
+        for step_id in completed:
+            if step_id in plan.graph:
+                if step_id in selected:
+                    print(f"Skipping step {step_id}: already completed in run {checkpoints.run_id}")
+                outputs[step_id] = completed[step_id]
+                done.add(step_id)
+
+    # Count unfinished dependencies per step and start steps as their count
+    # reaches zero; the heap keeps ready steps in workflow order
+    waiting = {}
+    ready = []
+    for step_id in selected - done:
+        waiting[step_id] = len(plan.graph[step_id] - done)
+        if not waiting[step_id]:
+            heapq.heappush(ready, plan.index[step_id])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+        while ready or running:
+            while ready and len(running) < max_workers:
+                step = plan.steps[heapq.heappop(ready)]
+                running[pool.submit(run_step, step)] = step["id"]
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                future.result()
+                step_id = running.pop(future)
+                done.add(step_id)
+                for dependent in plan.dependents[step_id]:
+                    if dependent in waiting:
+                        waiting[dependent] -= 1
+                        if not waiting[dependent]:
+                            heapq.heappush(ready, plan.index[dependent])
+
+    print("\n=== Workflow Completed ===")
+    return outputs
+
+
+# Agents that can process leads in micro-batches as part of a streaming chain
+STREAMING_AGENTS = {
+    "ProspectSearchAgent",
+    "DataEnrichmentAgent",
+    "ScoringAgent",
+    "OutreachContentAgent",
+    "OutreachExecutorAgent",
+}
+
+_END_OF_STREAM = object()
+
+def _stream_input_key(step, previous_id):
+    """
+    Return the input key of `step` that references the previous step's output.
+    """
+    for key, value in step.get("inputs", {}).items():
+        if isinstance(value, str) and value.strip("{} ").startswith(f"{previous_id}.output"):
+            return key
+    return None
+
+def _streaming_chain(steps):
+    """
+    Leading run of steps that can be streamed: a ProspectSearchAgent source
+    followed by batch-capable agents that each consume the previous step.
+    """
+    if not steps or steps[0]["agent"] != "ProspectSearchAgent":
+        return []
+    chain = [steps[0]]
+    for step in steps[1:]:
+        if step["agent"] not in STREAMING_AGENTS or not _stream_input_key(step, chain[-1]["id"]):
+            break
+        chain.append(step)
+    return chain
+
+def _rebatch(leads, batch_size):
+    batch = []
+    for lead in leads:
+        batch.append(lead)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def main_streaming(batch_size=50, queue_size=4):
+    """
+    Streaming execution mode. The leading chain of lead-processing steps
+    (search -> enrichment -> scoring -> content -> send) runs concurrently, one
+    thread per step, passing micro-batches of `batch_size` leads through bounded
+    queues of `queue_size` batches so a slow stage applies backpressure upstream.
+    Only the last streamed step's output is kept in `outputs`, plus the email,
+    role and technologies of each scored lead so feedback can still be
+    segmented (see _lead_attributes); the remaining steps then run as usual. Scoring sees one batch at a time, so a scoring
+    step with `top_k` cannot be streamed and is rejected (`min_score` is fine).
+    If any streamed step fails, its first error is raised once all stages
+    have stopped, and the remaining steps are not run.
+    """
+    plan = get_plan()
+    steps = plan.steps
+    chain = _streaming_chain(steps)
+    if len(chain) < 2:
+        return main()
+    for step in chain:
+        if step["agent"] == "ScoringAgent" and step.get("inputs", {}).get("top_k") is not None:
+            raise ValueError(f"Step {step['id']} sets top_k, which ranks all leads at once and "
+                             "cannot be applied per streamed batch; run without --stream")
+
+    print(f"\n=== Streaming Steps: {', '.join(step['id'] for step in chain)} ===")
+    queues = [queue.Queue(maxsize=queue_size) for _ in chain]
+    errors = []
+    sink = []
+    scored = {}
+
+    def source(step, out_queue):
+        with metrics.step(step["id"], step["agent"]) as step_metrics:
+            try:
+                agent = create_agent(step["agent"])
+                inputs = plan.resolve_inputs(step["id"], outputs)
+                inputs["stream"] = True
+                for batch in _rebatch(agent.run(**inputs), batch_size):
+                    step_metrics.leads_out += len(batch)
+                    out_queue.put(batch)
+            except Exception as e:
+                errors.append((step["id"], e))
+            finally:
+                out_queue.put(_END_OF_STREAM)
+
+    def stage(step, key, in_queue, out_queue):
+        agent = None
+        try:
+            agent = create_agent(step["agent"])
+            inputs = plan.resolve_inputs(step["id"], outputs)
+        except Exception as e:
+            errors.append((step["id"], e))
+        with metrics.step(step["id"], step["agent"]) as step_metrics:
+            while True:
+                batch = in_queue.get()
+                if batch is _END_OF_STREAM:
+                    break
+                if agent is None:
+                    continue  # Keep draining so upstream stages don't block forever
+                step_metrics.leads_in += len(batch)
+                try:
+                    result = run_agent(step["agent"], agent, {**inputs, key: batch})
+                    step_metrics.leads_out += len(result)
+                    if step["agent"] == "ScoringAgent":
+                        scored.setdefault(step["id"], []).extend(
+                            {"email": lead.get("email"), "role": lead.get("role"),
+                             "technologies": lead.get("technologies", [])}
+                            for lead in result
+                        )
+                    if out_queue is None:
+                        sink.extend(result)
+                    else:
+                        out_queue.put(result)
+                except Exception as e:
+                    errors.append((step["id"], e))
+                    agent = None
+        if out_queue is not None:
+            out_queue.put(_END_OF_STREAM)
+
+    threads = [threading.Thread(target=source, args=(chain[0], queues[0]), daemon=True)]
+    for i, step in enumerate(chain[1:], start=1):
+        key = _stream_input_key(step, chain[i - 1]["id"])
+        out_queue = queues[i] if i < len(chain) - 1 else None
+        threads.append(threading.Thread(target=stage, args=(step, key, queues[i - 1], out_queue), daemon=True))
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for step_id, error in errors:
+        print(f"[Streaming Error]: {error} in step {step_id}")
+    if errors:
+        # As in batch mode, a failed step fails the run instead of feeding
+        # partial output to the remaining steps
+        raise errors[0][1]
+
+    for step_id, leads in scored.items():
+        outputs[step_id] = {"output": leads}
+    last = chain[-1]
+    outputs[last["id"]] = {"output": sink}
+    print(f"Step {last['id']} completed. Output: {str(sink)[:200]}...")  # Print first 200 chars
+
+    for step in steps[len(chain):]:
+        run_step(step)
 
     print("\n=== Workflow Completed ===")
     return outputs
 
+def report_metrics(path=None):
+    """
+    Print the end-of-run summary table and export metrics to `path`
+    (JSON, or Prometheus text for .prom/.txt). Without a path, metrics are
+    written next to the run's checkpoints when checkpointing is active.
+    """
+    print("\n=== Run Metrics ===")
+    print(metrics.summary())
+    paths = [path] if path else []
+    if not paths and checkpoints is not None:
+        paths = [os.path.join(checkpoints.path, "metrics.json"), os.path.join(checkpoints.path, "metrics.prom")]
+    for target in paths:
+        metrics.export(target)
+        print(f"Metrics written to {target}")
+
 
 if __name__ == "__main__":
-    main()
+    load_env()
+    parser = argparse.ArgumentParser(description="Run the outbound lead generation workflow")
+    parser.add_argument("--workflow", default=WORKFLOW_PATH, help="workflow definition (default workflow.json)")
+    parser.add_argument("--steps", type=lambda value: value.split(","),
+                        help="comma-separated step ids to run (their dependencies run too)")
+    parser.add_argument("--stream", action="store_true",
+                        help="overlap lead-processing steps using bounded micro-batch queues")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="maximum number of independent steps to run in parallel")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="resume a previous run, skipping completed steps and leads")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="don't persist step outputs to .runs/")
+    parser.add_argument("--metrics-out", metavar="PATH", default=os.getenv("METRICS_PATH"),
+                        help="write run metrics to PATH (.json, or .prom for Prometheus text)")
+    args = parser.parse_args()
+
+    if args.stream and args.resume:
+        parser.error("--resume is not supported in --stream mode")
+    if args.stream and args.steps:
+        parser.error("--steps is not supported in --stream mode")
+
+    WORKFLOW_PATH = args.workflow
+
+    if args.stream:
+        main_streaming(batch_size=args.batch_size, queue_size=args.queue_size)
+    else:
+        if args.resume:
+            checkpoints = CheckpointStore.open_existing(args.resume)
+        elif not args.no_checkpoint:
+            checkpoints = CheckpointStore()
+        if checkpoints is not None:
+            print(f"Run ID: {checkpoints.run_id} (resume with --resume {checkpoints.run_id})")
+        main(max_workers=args.workers, steps=args.steps)
+    report_metrics(args.metrics_out)
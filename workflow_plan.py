@@ -0,0 +1,202 @@
+import json
+import heapq
+import hashlib
+
+from agents.lead import Lead
+
+
+def _references(obj):
+    """
+    Yield every {{...}} placeholder path found in a step's inputs.
+    """
+    if isinstance(obj, dict):
+        for value in obj.values():
+            yield from _references(value)
+    elif isinstance(obj, list):
+        for item in obj:
+            yield from _references(item)
+    elif isinstance(obj, str) and obj.startswith("{{") and obj.endswith("}}"):
+        yield obj[2:-2].strip()
+
+
+def build_dependency_graph(steps):
+    """
+    Derive {step_id: set of step ids it depends on} from {{step.output.key}}
+    placeholders. Raises ValueError for duplicate ids, references to unknown
+    steps and circular dependencies. {{config.*}} refers to workflow config.
+    """
+    ids = [step["id"] for step in steps]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate step ids in workflow: {ids}")
+
+    known = set(ids)
+    graph = {}
+    for step in steps:
+        deps = set()
+        for ref in _references(step.get("inputs", {})):
+            parts = ref.split(".")
+            if parts[0] == "config":
+                continue
+            if parts[0] not in known or len(parts) < 2 or parts[1] != "output":
+                raise ValueError(f"Step {step['id']} has unresolvable reference {{{{{ref}}}}}")
+            if parts[0] == step["id"]:
+                raise ValueError(f"Step {step['id']} references its own output")
+            deps.add(parts[0])
+        graph[step["id"]] = deps
+
+    # Kahn's algorithm to reject cycles up front
+    indegree = {step_id: len(deps) for step_id, deps in graph.items()}
+    dependents = {step_id: [] for step_id in graph}
+    for step_id, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(step_id)
+    ready = [step_id for step_id, count in indegree.items() if count == 0]
+    while ready:
+        step_id = ready.pop()
+        del indegree[step_id]
+        for dependent in dependents[step_id]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                ready.append(dependent)
+    if indegree:
+        raise ValueError(f"Circular dependency between steps: {sorted(indegree)}")
+    return graph
+
+
+def _compile_reference(parts):
+    """
+    Accessor for one pre-split placeholder path, e.g. ("prospect_search",
+    "output", "leads") for {{prospect_search.output.leads}}.
+    """
+    def resolve(outputs):
+        data = outputs
+        for part in parts:
+            if isinstance(data, Lead):
+                data = data.get(part, {})
+                continue
+            if not isinstance(data, dict):
+                # Agents return their payload (list or generator) directly, so
+                # the trailing key from the output_schema refers to it as a whole
+                break
+            data = data.get(part, {})
+        return data
+    return resolve
+
+
+def compile_inputs(obj):
+    """
+    Turn a step's inputs into a function of the step outputs. Placeholder
+    paths are parsed once here; parts without placeholders are returned as-is
+    rather than walked on every call.
+    """
+    if isinstance(obj, str) and obj.startswith("{{") and obj.endswith("}}"):
+        return _compile_reference(tuple(obj[2:-2].strip().split(".")))
+    if isinstance(obj, dict):
+        resolvers = {key: compile_inputs(value) for key, value in obj.items()}
+        dynamic = {key: r for key, r in resolvers.items() if not isinstance(r, _Constant)}
+        if not dynamic:
+            return _Constant(obj)
+        return lambda outputs: {
+            key: (r(outputs) if key in dynamic else obj[key]) for key, r in resolvers.items()
+        }
+    if isinstance(obj, list):
+        resolvers = [compile_inputs(item) for item in obj]
+        if all(isinstance(r, _Constant) for r in resolvers):
+            return _Constant(obj)
+        return lambda outputs: [r(outputs) for r in resolvers]
+    return _Constant(obj)
+
+
+class _Constant:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, outputs):
+        return self.value
+
+
+class WorkflowPlan:
+    """
+    WorkflowPlan:
+    Validated, precompiled form of a workflow.json: the dependency graph and
+    a stable topological order, each step's dependents, and a compiled input
+    resolver per step. Building one raises ValueError for an invalid workflow.
+    """
+
+    def __init__(self, workflow, known_agents=None, digest=None):
+        self.workflow = workflow
+        self.digest = digest
+        self.steps = workflow["steps"]
+        self.config = workflow.get("config", {})
+        self.by_id = {step["id"]: step for step in self.steps}
+        self.index = {step["id"]: i for i, step in enumerate(self.steps)}
+        self.graph = build_dependency_graph(self.steps)
+
+        if known_agents is not None:
+            for step in self.steps:
+                if step["agent"] not in known_agents:
+                    raise ValueError(f"Step {step['id']} uses unknown agent {step['agent']}")
+
+        self.dependents = {step_id: [] for step_id in self.graph}
+        for step_id, deps in self.graph.items():
+            for dep in deps:
+                self.dependents[dep].append(step_id)
+        self.order = self._topological_order()
+        self._resolvers = {step["id"]: compile_inputs(step.get("inputs", {})) for step in self.steps}
+
+    def _topological_order(self):
+        indegree = {step_id: len(deps) for step_id, deps in self.graph.items()}
+        ready = [self.index[step_id] for step_id, count in indegree.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            step_id = self.steps[heapq.heappop(ready)]["id"]
+            order.append(step_id)
+            for dependent in self.dependents[step_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    heapq.heappush(ready, self.index[dependent])
+        return order
+
+    def resolve_inputs(self, step_id, outputs):
+        """
+        The step's inputs with placeholders replaced from `outputs`, as a new dict.
+        """
+        inputs = self._resolvers[step_id](outputs)
+        return dict(inputs) if isinstance(inputs, dict) else inputs
+
+    def with_dependencies(self, step_ids):
+        """
+        The given step ids plus every step they transitively depend on.
+        """
+        unknown = set(step_ids) - set(self.graph)
+        if unknown:
+            raise ValueError(f"Unknown steps: {sorted(unknown)}")
+        selected = set()
+        stack = list(step_ids)
+        while stack:
+            step_id = stack.pop()
+            if step_id not in selected:
+                selected.add(step_id)
+                stack.extend(self.graph[step_id])
+        return selected
+
+
+# Compiled plans by sha256 of the workflow file's bytes
+_plans = {}
+
+
+def load_plan(path="workflow.json", known_agents=None):
+    """
+    Read, validate and compile a workflow file. Plans are cached by the file's
+    content hash, so reloading an unchanged workflow skips validation.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    plan = _plans.get(digest)
+    if plan is None:
+        plan = _plans[digest] = WorkflowPlan(json.loads(data), known_agents, digest)
+    return plan